@@ -1,10 +1,10 @@
 """API routes for the dropshipping automation system."""
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional
 from datetime import datetime
 
 from backend.models.schemas import (
-    Product, StoreConfig, AdCampaign, Order, 
+    Product, ProductPage, ProductStatus, StoreConfig, AdCampaign, Order, 
     CustomerMessage, DashboardMetrics
 )
 from backend.services.product_discovery import ProductDiscoveryService
@@ -13,9 +13,21 @@ from backend.services.ad_manager import AdManager
 from backend.services.order_fulfillment import OrderFulfillmentService
 from backend.services.customer_service_agent import CustomerServiceAgent
 from backend.services.analytics import AnalyticsService
+from backend.services.cache import SWRCache, DegradedResult, StaleResultError
+from backend.services.catalog import get_product_catalog
+from backend.services.bulk_listing import BulkListingPipeline
+from backend.config.settings import get_settings
 
+settings = get_settings()
 router = APIRouter()
 
+# Shared by every dashboard poll so open tabs reuse one computation
+metrics_cache = SWRCache(
+    ttl=settings.dashboard_cache_ttl,
+    stale_ttl=settings.dashboard_cache_stale_ttl,
+    max_stale=settings.dashboard_cache_max_stale
+)
+
 
 @router.get("/products/discover", response_model=List[Product])
 async def discover_products(
@@ -33,6 +45,29 @@ async def discover_products(
     return products
 
 
+@router.get("/products", response_model=ProductPage)
+async def list_products(
+    status: Optional[ProductStatus] = None,
+    category: Optional[str] = None,
+    supplier_id: Optional[str] = None,
+    min_margin: Optional[float] = None,
+    sort: str = "margin",
+    limit: int = Query(50, ge=1, le=250),
+    offset: int = Query(0, ge=0)
+):
+    """Browse the product catalog with filters and pagination."""
+    catalog = get_product_catalog()
+    return await catalog.list_products(
+        status=status,
+        category=category,
+        supplier_id=supplier_id,
+        min_margin=min_margin,
+        sort=sort,
+        limit=limit,
+        offset=offset
+    )
+
+
 @router.post("/store/create")
 async def create_store(config: StoreConfig):
     """Create or update Shopify store configuration."""
@@ -49,6 +84,21 @@ async def add_product(product: Product):
     return {"status": "success", "product": result}
 
 
+@router.post("/products/bulk-add")
+async def bulk_add_products(products: List[Product]):
+    """Add many products to Shopify store through the listing pipeline."""
+    if len(products) > settings.bulk_listing_max_products:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.bulk_listing_max_products} products per request"
+        )
+    
+    pipeline = BulkListingPipeline()
+    results = await pipeline.run(products)
+    listed = sum(1 for result in results if result["status"] == "success")
+    return {"status": "success", "listed": listed, "failed": len(results) - listed, "results": results}
+
+
 @router.post("/ads/create", response_model=AdCampaign)
 async def create_ad_campaign(campaign: AdCampaign):
     """Create ad campaign on TikTok/Facebook."""
@@ -102,9 +152,22 @@ async def get_dashboard_metrics(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None
 ):
-    """Get dashboard metrics."""
-    service = AnalyticsService()
-    metrics = await service.get_metrics(start_date, end_date)
+    """Get dashboard metrics (served from cache, refreshed in the background)."""
+    async def compute_metrics():
+        service = AnalyticsService()
+        metrics = await service.get_metrics(start_date, end_date)
+        if service.degraded:
+            # Keep serving the last good metrics rather than a fallback
+            raise DegradedResult(metrics)
+        return metrics
+    
+    try:
+        metrics = await metrics_cache.get((start_date, end_date), compute_metrics)
+    except StaleResultError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Metrics sources are degraded and the last good metrics are {e.age:.0f}s old"
+        )
     return metrics
 
 
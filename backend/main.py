@@ -9,6 +9,9 @@ import uvicorn
 
 from backend.api import routes
 from backend.services.orchestrator import AutomationOrchestrator
+from backend.services.http_client import get_http_registry, close_http_clients
+from backend.services.shopify_client import close_shopify_client
+from backend.models.database import init_db, close_db
 from backend.config.settings import get_settings
 
 settings = get_settings()
@@ -22,6 +25,8 @@ async def lifespan(app: FastAPI):
     """Manage application lifecycle."""
     global orchestrator
     # Startup
+    get_http_registry()
+    await init_db()
     orchestrator = AutomationOrchestrator()
     await orchestrator.initialize()
     
@@ -30,6 +35,9 @@ async def lifespan(app: FastAPI):
     # Shutdown
     if orchestrator:
         await orchestrator.shutdown()
+    close_shopify_client()
+    await close_http_clients()
+    await close_db()
 
 
 app = FastAPI(
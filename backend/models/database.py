@@ -0,0 +1,248 @@
+"""SQLAlchemy tables and async engine for local persistence."""
+from typing import Dict, Iterable, List, Optional
+from datetime import datetime
+from sqlalchemy import String, Float, Integer, DateTime, Text, JSON, ForeignKey, Index
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+from backend.config.settings import get_settings
+
+settings = get_settings()
+
+# Rows per multi-row INSERT, well under SQLite's bound-parameter limit
+UPSERT_BATCH_SIZE = 500
+
+# Async drivers for the sync-style URLs used in configuration
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+class Base(DeclarativeBase):
+    """Declarative base for all tables."""
+    pass
+
+
+class CatalogProductRecord(Base):
+    """Product in the local catalog, from discovery through listing."""
+    __tablename__ = "products"
+    
+    # Supplier product id, also used as the Shopify variant SKU
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    title: Mapped[str] = mapped_column(String(255), default="")
+    description: Mapped[str] = mapped_column(Text, default="")
+    price: Mapped[float] = mapped_column(Float, default=0.0)
+    cost: Mapped[float] = mapped_column(Float, default=0.0)
+    margin: Mapped[float] = mapped_column(Float, default=0.0, index=True)
+    profit: Mapped[float] = mapped_column(Float, default=0.0)
+    score: Mapped[Optional[float]] = mapped_column(Float)
+    currency: Mapped[str] = mapped_column(String(8), default="USD")
+    category: Mapped[str] = mapped_column(String(128), default="", index=True)
+    images: Mapped[List[str]] = mapped_column(JSON, default=list)
+    supplier_id: Mapped[str] = mapped_column(String(64), default="", index=True)
+    supplier_name: Mapped[str] = mapped_column(String(255), default="")
+    supplier_url: Mapped[str] = mapped_column(String(2048), default="")
+    shipping_info: Mapped[Dict] = mapped_column(JSON, default=dict)
+    status: Mapped[str] = mapped_column(String(16), default="discovered", index=True)
+    shopify_product_id: Mapped[Optional[str]] = mapped_column(String(32), index=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+
+class OrderRecord(Base):
+    """Shopify order mirrored into the local warehouse."""
+    __tablename__ = "orders"
+    
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    order_number: Mapped[Optional[str]] = mapped_column(String(32))
+    total_price: Mapped[float] = mapped_column(Float, default=0.0)
+    currency: Mapped[Optional[str]] = mapped_column(String(8))
+    financial_status: Mapped[Optional[str]] = mapped_column(String(32))
+    fulfillment_status: Mapped[Optional[str]] = mapped_column(String(32))
+    # UTC timestamps, plus the store-local calendar day used for daily series
+    created_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    created_date: Mapped[str] = mapped_column(String(10), index=True)
+
+
+class OrderLineItemRecord(Base):
+    """Line item of a warehoused order."""
+    __tablename__ = "order_line_items"
+    __table_args__ = (
+        Index("ix_order_line_items_sku_created_at", "sku", "created_at"),
+    )
+    
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    order_id: Mapped[str] = mapped_column(
+        String(32), ForeignKey("orders.id", ondelete="CASCADE"), index=True
+    )
+    sku: Mapped[Optional[str]] = mapped_column(String(64))
+    title: Mapped[str] = mapped_column(String(255), default="")
+    quantity: Mapped[int] = mapped_column(Integer, default=0)
+    price: Mapped[float] = mapped_column(Float, default=0.0)
+    # Landed unit cost when the order was synced; None if the SKU had none yet
+    unit_cost: Mapped[Optional[float]] = mapped_column(Float)
+    created_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    created_date: Mapped[str] = mapped_column(String(10))
+
+
+class DailySalesRollup(Base):
+    """Precomputed store-wide totals for one calendar day."""
+    __tablename__ = "daily_sales_rollups"
+    
+    day: Mapped[str] = mapped_column(String(10), primary_key=True)
+    orders: Mapped[int] = mapped_column(Integer, default=0)
+    sales: Mapped[float] = mapped_column(Float, default=0.0)
+    quantity: Mapped[int] = mapped_column(Integer, default=0)
+    cost: Mapped[float] = mapped_column(Float, default=0.0)
+    ad_spend: Mapped[float] = mapped_column(Float, default=0.0)
+    profit: Mapped[float] = mapped_column(Float, default=0.0)
+
+
+class DailyProductRollup(Base):
+    """Precomputed per-product totals for one calendar day."""
+    __tablename__ = "daily_product_rollups"
+    
+    day: Mapped[str] = mapped_column(String(10), primary_key=True)
+    product: Mapped[str] = mapped_column(String(255), primary_key=True)
+    sku: Mapped[Optional[str]] = mapped_column(String(64))
+    sales: Mapped[float] = mapped_column(Float, default=0.0)
+    quantity: Mapped[int] = mapped_column(Integer, default=0)
+    cost: Mapped[float] = mapped_column(Float, default=0.0)
+    profit: Mapped[float] = mapped_column(Float, default=0.0)
+
+
+class ProductCostRecord(Base):
+    """Landed unit cost (supplier price plus shipping) of a listed SKU."""
+    __tablename__ = "product_costs"
+    
+    sku: Mapped[str] = mapped_column(String(64), primary_key=True)
+    cost: Mapped[float] = mapped_column(Float)
+    shipping_cost: Mapped[float] = mapped_column(Float, default=0.0)
+    supplier_id: Mapped[Optional[str]] = mapped_column(String(64))
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+
+class SeenProductRecord(Base):
+    """Supplier product that has already been listed in the store."""
+    __tablename__ = "seen_products"
+    
+    product_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    supplier_id: Mapped[Optional[str]] = mapped_column(String(64))
+    shopify_product_id: Mapped[Optional[str]] = mapped_column(String(32))
+    seen_at: Mapped[datetime] = mapped_column(DateTime)
+
+
+class ImageHashRecord(Base):
+    """Perceptual hash of a supplier product image, computed once per URL."""
+    __tablename__ = "image_hashes"
+    
+    url: Mapped[str] = mapped_column(String(2048), primary_key=True)
+    hash: Mapped[str] = mapped_column(String(16))  # 64-bit hash as hex
+    hashed_at: Mapped[datetime] = mapped_column(DateTime)
+
+
+class SupplierSnapshotRecord(Base):
+    """Last seen supplier price and stock of a listed product."""
+    __tablename__ = "supplier_snapshots"
+    
+    product_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    price: Mapped[float] = mapped_column(Float, default=0.0)
+    shipping_cost: Mapped[float] = mapped_column(Float, default=0.0)
+    stock: Mapped[Optional[int]] = mapped_column(Integer)
+    checksum: Mapped[str] = mapped_column(String(32))
+    checked_at: Mapped[datetime] = mapped_column(DateTime)
+
+
+class SyncState(Base):
+    """Incremental sync cursor for an upstream feed."""
+    __tablename__ = "sync_state"
+    
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    cursor: Mapped[Optional[str]] = mapped_column(String(64))
+    synced_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    # Feeds read over several runs: next page of the window, and the cursor
+    # to move to once the window has been read to the end
+    next_page: Mapped[Optional[int]] = mapped_column(Integer)
+    pending_cursor: Mapped[Optional[str]] = mapped_column(String(64))
+
+
+_engine: Optional[AsyncEngine] = None
+_sessionmaker: Optional[async_sessionmaker] = None
+
+
+def async_database_url(url: str) -> str:
+    """Swap a plain database URL onto its async driver."""
+    scheme, sep, rest = url.partition("://")
+    if "+" in scheme:
+        return url
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+def get_engine() -> AsyncEngine:
+    """Get async engine singleton."""
+    global _engine
+    if _engine is None:
+        _engine = create_async_engine(async_database_url(settings.database_url))
+    return _engine
+
+
+def get_sessionmaker() -> async_sessionmaker:
+    """Get async session factory singleton."""
+    global _sessionmaker
+    if _sessionmaker is None:
+        _sessionmaker = async_sessionmaker(get_engine(), class_=AsyncSession, expire_on_commit=False)
+    return _sessionmaker
+
+
+async def init_db():
+    """Create any missing tables."""
+    async with get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def close_db():
+    """Dispose of the engine's connection pool."""
+    global _engine, _sessionmaker
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+        _sessionmaker = None
+
+
+def upsert(model: type, rows: List[Dict], index_elements: List[str], insert_only: Iterable[str] = ()):
+    """
+    Build an INSERT ... ON CONFLICT DO UPDATE for SQLite or PostgreSQL.
+
+    Columns in insert_only are written for new rows but left as they are
+    on conflict.
+    """
+    dialect = get_engine().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upsert not supported for {dialect}")
+    
+    # Only columns supplied in the rows are overwritten on conflict
+    stmt = insert(model).values(rows)
+    update_columns = {
+        name: stmt.excluded[name]
+        for name in rows[0]
+        if name not in index_elements and name not in insert_only
+    }
+    return stmt.on_conflict_do_update(index_elements=index_elements, set_=update_columns)
+
+
+async def bulk_upsert(
+    session: AsyncSession,
+    model: type,
+    rows: List[Dict],
+    index_elements: List[str],
+    insert_only: Iterable[str] = ()
+):
+    """Upsert rows in batches within the caller's transaction."""
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        await session.execute(upsert(model, rows[start:start + UPSERT_BATCH_SIZE], index_elements, insert_only))
@@ -1,5 +1,5 @@
 """Pydantic schemas for API models."""
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List, Dict
 from datetime import datetime
 from enum import Enum
@@ -23,6 +23,7 @@ class Product(BaseModel):
     cost: float
     margin: float
     profit: float
+    score: Optional[float] = None  # Composite discovery ranking score
     currency: str = "USD"
     category: str
     images: List[str] = []
@@ -34,6 +35,35 @@ class Product(BaseModel):
     created_at: Optional[datetime] = None
 
 
+class ProductPage(BaseModel):
+    """One page of catalog products."""
+    items: List[Product]
+    total: int
+    limit: int
+    offset: int
+
+
+class ListingCopy(BaseModel):
+    """AI-generated copy for a product listing."""
+    description: str = Field(min_length=1)
+    seo_title: str = Field(min_length=1, max_length=80)
+    tags: List[str] = Field(min_length=1)
+    
+    @field_validator("seo_title")
+    @classmethod
+    def clean_title(cls, value: str) -> str:
+        return value.strip().strip('"').strip("'").split("\n")[0].strip()
+    
+    @field_validator("tags")
+    @classmethod
+    def clean_tags(cls, value: List[str]) -> List[str]:
+        tags = [tag.strip().strip('"').strip("'").strip() for tag in value]
+        tags = [tag for tag in tags if tag][:8]
+        if not tags:
+            raise ValueError("no usable tags")
+        return tags
+
+
 class StoreConfig(BaseModel):
     """Shopify store configuration."""
     store_name: str
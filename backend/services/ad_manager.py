@@ -1,11 +1,11 @@
 """Ad campaign management service for TikTok and Facebook."""
 import logging
 from typing import List, Optional, Dict
-import httpx
 from datetime import datetime
 
 from backend.models.schemas import AdCampaign, AdPlatform
 from backend.config.settings import get_settings
+from backend.services.http_client import get_http_client
 from backend.services.ai_content_generator import AIContentGenerator
 from backend.services.video_generator import VideoGenerator
 
@@ -99,43 +99,43 @@ class AdManager:
             }
         
         try:
-            async with httpx.AsyncClient() as client:
-                # TikTok Ads API endpoint
-                url = "https://business-api.tiktok.com/open_api/v1.3/ad/campaign/create/"
-                headers = {
-                    "Access-Token": self.tiktok_access_token,
-                    "Content-Type": "application/json"
-                }
+            # TikTok Ads API endpoint
+            url = "https://business-api.tiktok.com/open_api/v1.3/ad/campaign/create/"
+            headers = {
+                "Access-Token": self.tiktok_access_token,
+                "Content-Type": "application/json"
+            }
+            
+            payload = {
+                "advertiser_id": self.tiktok_advertiser_id,
+                "campaign_name": campaign.name,
+                "budget_mode": "BUDGET_MODE_DAILY" if campaign.daily_budget else "BUDGET_MODE_TOTAL",
+                "budget": campaign.daily_budget or campaign.budget,
+                "objective_type": "CONVERSIONS",
+                "targeting": campaign.target_audience
+            }
+            
+            client = get_http_client(url)
+            response = await client.post(url, headers=headers, json=payload, timeout=30.0)
+            response.raise_for_status()
+            data = response.json()
+            
+            # Create ad group and creative
+            campaign_id = data.get("data", {}).get("campaign_id")
+            if campaign_id:
+                # Create ad group
+                ad_group_result = await self._create_tiktok_ad_group(
+                    campaign_id, campaign
+                )
                 
-                payload = {
-                    "advertiser_id": self.tiktok_advertiser_id,
-                    "campaign_name": campaign.name,
-                    "budget_mode": "BUDGET_MODE_DAILY" if campaign.daily_budget else "BUDGET_MODE_TOTAL",
-                    "budget": campaign.daily_budget or campaign.budget,
-                    "objective_type": "CONVERSIONS",
-                    "targeting": campaign.target_audience
+                return {
+                    "campaign_id": campaign_id,
+                    "ad_group_id": ad_group_result.get("ad_group_id"),
+                    "status": "active"
                 }
-                
-                response = await client.post(url, headers=headers, json=payload, timeout=30.0)
-                response.raise_for_status()
-                data = response.json()
-                
-                # Create ad group and creative
-                campaign_id = data.get("data", {}).get("campaign_id")
-                if campaign_id:
-                    # Create ad group
-                    ad_group_result = await self._create_tiktok_ad_group(
-                        campaign_id, campaign
-                    )
-                    
-                    return {
-                        "campaign_id": campaign_id,
-                        "ad_group_id": ad_group_result.get("ad_group_id"),
-                        "status": "active"
-                    }
-                
-                return {"campaign_id": campaign_id, "status": "pending"}
-                
+            
+            return {"campaign_id": campaign_id, "status": "pending"}
+            
         except Exception as e:
             logger.error(f"Error creating TikTok campaign: {e}")
             return {"campaign_id": None, "status": "error", "error": str(e)}
@@ -147,41 +147,41 @@ class AdManager:
     ) -> Dict:
         """Create ad group within TikTok campaign."""
         try:
-            async with httpx.AsyncClient() as client:
-                url = "https://business-api.tiktok.com/open_api/v1.3/ad/group/create/"
-                headers = {
-                    "Access-Token": self.tiktok_access_token,
-                    "Content-Type": "application/json"
-                }
-                
-                payload = {
-                    "advertiser_id": self.tiktok_advertiser_id,
-                    "campaign_id": campaign_id,
-                    "ad_group_name": f"{campaign.name} - Ad Group",
-                    "placement_type": ["PLACEMENT_TIKTOK"],
-                    "optimization_goal": "CONVERSION",
-                    "budget_mode": "BUDGET_MODE_DAILY",
-                    "budget": campaign.daily_budget or (campaign.budget / 7),  # Daily budget
-                    "bid_type": "BID_TYPE_NO_BID",
-                    "targeting": campaign.target_audience or {
-                        "age_range": [18, 55],
-                        "genders": [1, 2],  # Both genders
-                        "location": ["US"]
-                    },
-                    "creative": {
-                        "video_id": campaign.creative_video_url,  # Would need to upload video first
-                        "caption": campaign.creative_caption
-                    }
-                }
-                
-                response = await client.post(url, headers=headers, json=payload, timeout=30.0)
-                response.raise_for_status()
-                data = response.json()
-                
-                return {
-                    "ad_group_id": data.get("data", {}).get("ad_group_id")
+            url = "https://business-api.tiktok.com/open_api/v1.3/ad/group/create/"
+            headers = {
+                "Access-Token": self.tiktok_access_token,
+                "Content-Type": "application/json"
+            }
+            
+            payload = {
+                "advertiser_id": self.tiktok_advertiser_id,
+                "campaign_id": campaign_id,
+                "ad_group_name": f"{campaign.name} - Ad Group",
+                "placement_type": ["PLACEMENT_TIKTOK"],
+                "optimization_goal": "CONVERSION",
+                "budget_mode": "BUDGET_MODE_DAILY",
+                "budget": campaign.daily_budget or (campaign.budget / 7),  # Daily budget
+                "bid_type": "BID_TYPE_NO_BID",
+                "targeting": campaign.target_audience or {
+                    "age_range": [18, 55],
+                    "genders": [1, 2],  # Both genders
+                    "location": ["US"]
+                },
+                "creative": {
+                    "video_id": campaign.creative_video_url,  # Would need to upload video first
+                    "caption": campaign.creative_caption
                 }
-                
+            }
+            
+            client = get_http_client(url)
+            response = await client.post(url, headers=headers, json=payload, timeout=30.0)
+            response.raise_for_status()
+            data = response.json()
+            
+            return {
+                "ad_group_id": data.get("data", {}).get("ad_group_id")
+            }
+            
         except Exception as e:
             logger.error(f"Error creating TikTok ad group: {e}")
             return {"ad_group_id": None}
@@ -197,33 +197,33 @@ class AdManager:
             }
         
         try:
-            async with httpx.AsyncClient() as client:
-                # Create campaign
-                url = f"https://graph.facebook.com/v18.0/{self.facebook_ad_account_id}/campaigns"
-                params = {
-                    "name": campaign.name,
-                    "objective": "CONVERSIONS",
-                    "status": "PAUSED",  # Start paused, activate manually
-                    "special_ad_categories": [],
-                    "access_token": self.facebook_access_token
-                }
-                
-                response = await client.post(url, params=params, timeout=30.0)
-                response.raise_for_status()
-                data = response.json()
-                campaign_id = data.get("id")
-                
-                # Create ad set
-                ad_set_id = await self._create_facebook_ad_set(
-                    campaign_id, campaign
-                )
-                
-                return {
-                    "campaign_id": campaign_id,
-                    "ad_set_id": ad_set_id,
-                    "status": "paused"  # Needs manual activation
-                }
-                
+            # Create campaign
+            url = f"https://graph.facebook.com/v18.0/{self.facebook_ad_account_id}/campaigns"
+            params = {
+                "name": campaign.name,
+                "objective": "CONVERSIONS",
+                "status": "PAUSED",  # Start paused, activate manually
+                "special_ad_categories": [],
+                "access_token": self.facebook_access_token
+            }
+            
+            client = get_http_client(url)
+            response = await client.post(url, params=params, timeout=30.0)
+            response.raise_for_status()
+            data = response.json()
+            campaign_id = data.get("id")
+            
+            # Create ad set
+            ad_set_id = await self._create_facebook_ad_set(
+                campaign_id, campaign
+            )
+            
+            return {
+                "campaign_id": campaign_id,
+                "ad_set_id": ad_set_id,
+                "status": "paused"  # Needs manual activation
+            }
+            
         except Exception as e:
             logger.error(f"Error creating Facebook campaign: {e}")
             return {"campaign_id": None, "status": "error", "error": str(e)}
@@ -235,30 +235,30 @@ class AdManager:
     ) -> Optional[str]:
         """Create ad set within Facebook campaign."""
         try:
-            async with httpx.AsyncClient() as client:
-                url = f"https://graph.facebook.com/v18.0/{self.facebook_ad_account_id}/adsets"
-                params = {
-                    "name": f"{campaign.name} - Ad Set",
-                    "campaign_id": campaign_id,
-                    "daily_budget": int((campaign.daily_budget or campaign.budget / 7) * 100),  # In cents
-                    "billing_event": "IMPRESSIONS",
-                    "optimization_goal": "OFFSITE_CONVERSIONS",
-                    "targeting": str(campaign.target_audience or {
-                        "age_min": 18,
-                        "age_max": 55,
-                        "genders": [1, 2],
-                        "geo_locations": {"countries": ["US"]}
-                    }),
-                    "status": "PAUSED",
-                    "access_token": self.facebook_access_token
-                }
-                
-                response = await client.post(url, params=params, timeout=30.0)
-                response.raise_for_status()
-                data = response.json()
-                
-                return data.get("id")
-                
+            url = f"https://graph.facebook.com/v18.0/{self.facebook_ad_account_id}/adsets"
+            params = {
+                "name": f"{campaign.name} - Ad Set",
+                "campaign_id": campaign_id,
+                "daily_budget": int((campaign.daily_budget or campaign.budget / 7) * 100),  # In cents
+                "billing_event": "IMPRESSIONS",
+                "optimization_goal": "OFFSITE_CONVERSIONS",
+                "targeting": str(campaign.target_audience or {
+                    "age_min": 18,
+                    "age_max": 55,
+                    "genders": [1, 2],
+                    "geo_locations": {"countries": ["US"]}
+                }),
+                "status": "PAUSED",
+                "access_token": self.facebook_access_token
+            }
+            
+            client = get_http_client(url)
+            response = await client.post(url, params=params, timeout=30.0)
+            response.raise_for_status()
+            data = response.json()
+            
+            return data.get("id")
+            
         except Exception as e:
             logger.error(f"Error creating Facebook ad set: {e}")
             return None
@@ -1,9 +1,18 @@
 """AI content generation service for product descriptions, ads, etc."""
+import asyncio
+import json
 import logging
-from typing import List
-import httpx
+from typing import Callable, Dict, List, Optional
+from pydantic import ValidationError
 
+from backend.models.schemas import ListingCopy
 from backend.config.settings import get_settings
+from backend.services.http_client import get_http_client
+from backend.services.llm_cache import get_llm_cache, response_key
+from backend.services.hf_batching import get_hf_batcher
+from backend.services.llm_scheduler import (
+    Priority, RateLimitedError, get_llm_scheduler, estimate_tokens, retry_after_seconds
+)
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -23,15 +32,65 @@ class AIContentGenerator:
         
         if self.use_huggingface:
             logger.info(f"Using Hugging Face model: {self.huggingface_model}")
+        
+        self.cache = get_llm_cache() if settings.llm_cache_enabled else None
     
-    async def _call_ai_api(self, prompt: str, system_prompt: str = "", max_tokens: int = 500) -> str:
-        """Call AI API (Hugging Face or OpenAI)."""
+    async def _call_ai_api(
+        self,
+        prompt: str,
+        system_prompt: str = "",
+        max_tokens: int = 500,
+        priority: Priority = Priority.CATALOG,
+        validate: Optional[Callable[[str], bool]] = None
+    ) -> str:
+        """
+        Call AI API (Hugging Face or OpenAI), reusing cached responses.
+
+        When validate is given, only responses it accepts are cached or
+        served from the cache.
+        """
         if self.use_huggingface:
-            return await self._call_huggingface(prompt, system_prompt, max_tokens)
+            provider, model = "huggingface", self.huggingface_model
         elif self.openai_key:
-            return await self._call_openai(prompt, system_prompt, max_tokens)
+            provider, model = "openai", settings.openai_model
         else:
             return ""
+        
+        key = response_key(provider, model, system_prompt, prompt, max_tokens)
+        if self.cache:
+            cached = await self.cache.get(key)
+            if cached is not None and (validate is None or validate(cached)):
+                return cached
+        
+        if provider == "huggingface" and settings.huggingface_batching_enabled:
+            # Batched with concurrent requests; the batcher does the scheduling
+            try:
+                full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
+                response = await get_hf_batcher().generate(full_prompt, max_tokens, priority)
+            except Exception as e:
+                logger.error(f"Error calling Hugging Face API: {e}")
+                return ""
+        else:
+            if provider == "huggingface":
+                call = lambda: self._call_huggingface(prompt, system_prompt, max_tokens)
+            else:
+                call = lambda: self._call_openai(prompt, system_prompt, max_tokens)
+            
+            # Queue within the provider's rate limits instead of tripping them
+            try:
+                response = await get_llm_scheduler(provider).run(
+                    call,
+                    priority=priority,
+                    tokens=estimate_tokens(system_prompt, prompt) + max_tokens
+                )
+            except RateLimitedError as e:
+                logger.error(f"{provider} still rate limited after retries: {e}")
+                return ""
+        
+        # Failed calls come back empty; never cache those
+        if response and self.cache and (validate is None or validate(response)):
+            await self.cache.set(key, response)
+        return response
     
     async def _call_huggingface(self, prompt: str, system_prompt: str = "", max_tokens: int = 500) -> str:
         """Call Hugging Face Inference API."""
@@ -39,42 +98,46 @@ class AIContentGenerator:
             # Format prompt with system message
             full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
             
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                headers = {
-                    "Authorization": f"Bearer {self.huggingface_token}",
-                    "Content-Type": "application/json"
-                }
-                
-                payload = {
-                    "inputs": full_prompt,
-                    "parameters": {
-                        "max_new_tokens": max_tokens,
-                        "temperature": 0.7,
-                        "top_p": 0.9,
-                        "return_full_text": False
-                    }
+            headers = {
+                "Authorization": f"Bearer {self.huggingface_token}",
+                "Content-Type": "application/json"
+            }
+            
+            payload = {
+                "inputs": full_prompt,
+                "parameters": {
+                    "max_new_tokens": max_tokens,
+                    "temperature": 0.7,
+                    "top_p": 0.9,
+                    "return_full_text": False
                 }
-                
-                # Use Hugging Face Inference API
-                api_url = f"https://api-inference.huggingface.co/models/{self.huggingface_model}"
-                
-                response = await client.post(api_url, headers=headers, json=payload)
-                response.raise_for_status()
-                data = response.json()
-                
-                # Handle different response formats
-                if isinstance(data, list) and len(data) > 0:
-                    if "generated_text" in data[0]:
-                        return data[0]["generated_text"].strip()
-                    elif "text" in data[0]:
-                        return data[0]["text"].strip()
-                
-                # Fallback: try direct text response
-                if isinstance(data, dict) and "generated_text" in data:
-                    return data["generated_text"].strip()
-                
-                return str(data).strip()
-                
+            }
+            
+            # Use Hugging Face Inference API
+            api_url = f"https://api-inference.huggingface.co/models/{self.huggingface_model}"
+            
+            client = get_http_client(api_url)
+            response = await client.post(api_url, headers=headers, json=payload, timeout=60.0)
+            if response.status_code == 429:
+                raise RateLimitedError(retry_after_seconds(response.headers))
+            response.raise_for_status()
+            data = response.json()
+            
+            # Handle different response formats
+            if isinstance(data, list) and len(data) > 0:
+                if "generated_text" in data[0]:
+                    return data[0]["generated_text"].strip()
+                elif "text" in data[0]:
+                    return data[0]["text"].strip()
+            
+            # Fallback: try direct text response
+            if isinstance(data, dict) and "generated_text" in data:
+                return data["generated_text"].strip()
+            
+            return str(data).strip()
+            
+        except RateLimitedError:
+            raise
         except Exception as e:
             logger.error(f"Error calling Hugging Face API: {e}")
             return ""
@@ -92,15 +155,20 @@ class AIContentGenerator:
                 messages.append({"role": "system", "content": system_prompt})
             messages.append({"role": "user", "content": prompt})
             
-            response = await client.chat.completions.create(
-                model=settings.openai_model,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=max_tokens
-            )
+            try:
+                response = await client.chat.completions.create(
+                    model=settings.openai_model,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=max_tokens
+                )
+            except openai.RateLimitError as e:
+                raise RateLimitedError(retry_after_seconds(e.response.headers)) from e
             
             return response.choices[0].message.content.strip()
             
+        except RateLimitedError:
+            raise
         except Exception as e:
             logger.error(f"Error calling OpenAI API: {e}")
             return ""
@@ -146,6 +214,105 @@ Format the response as HTML with proper tags."""
             logger.error(f"Error generating description: {e}")
             return self._mock_product_description(product_title, base_description)
     
+    async def generate_listing_copy(
+        self,
+        product_title: str,
+        base_description: str,
+        category: str
+    ) -> Dict:
+        """
+        Generate description, SEO title and tags in one structured call.
+
+        Falls back to the per-field methods when the response is not valid
+        JSON of the expected shape.
+        """
+        if not self.huggingface_token and not self.openai_key:
+            return {
+                "description": self._mock_product_description(product_title, base_description),
+                "seo_title": product_title,
+                "tags": self._mock_product_tags(product_title, category)
+            }
+        
+        try:
+            system_prompt = "You are an expert e-commerce copywriter and SEO specialist. You answer with JSON only."
+            
+            prompt = f"""Write the store listing copy for this product.
+
+Product Title: {product_title}
+Category: {category}
+Base Information: {base_description}
+
+Return a JSON object with exactly these keys:
+- "description": compelling, benefit-focused HTML product description (200-300 words) with bullet points and a call-to-action
+- "seo_title": SEO-optimized title under 60 characters, natural and compelling
+- "tags": list of 5-8 relevant product tags
+
+Return only the JSON object, nothing else."""
+            
+            # Unparseable responses are not cached, so the next listing retries
+            result = await self._call_ai_api(
+                prompt,
+                system_prompt,
+                max_tokens=700,
+                validate=lambda response: self._parse_listing_copy(response) is not None
+            )
+            copy = self._parse_listing_copy(result)
+            if copy:
+                logger.info(f"Generated listing copy for: {product_title}")
+                return copy.model_dump()
+            
+            logger.warning(f"Unparseable listing copy for {product_title}, generating fields separately")
+            
+        except Exception as e:
+            logger.error(f"Error generating listing copy: {e}")
+        
+        return await self.generate_listing_fields(product_title, base_description, category)
+    
+    async def generate_listing_fields(
+        self,
+        product_title: str,
+        base_description: str,
+        category: str
+    ) -> Dict:
+        """
+        Generate description, SEO title and tags with one concurrent call each.
+
+        A field that takes longer than ai_field_timeout gets its mock
+        output, so one slow generation cannot hold up the listing.
+        """
+        async def bounded(field: str, generation, fallback):
+            try:
+                return await asyncio.wait_for(generation, timeout=settings.ai_field_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Generating {field} for {product_title} timed out, using fallback")
+                return fallback
+        
+        description, seo_title, tags = await asyncio.gather(
+            bounded(
+                "description",
+                self.generate_product_description(product_title, base_description, category),
+                self._mock_product_description(product_title, base_description)
+            ),
+            bounded("SEO title", self.generate_seo_title(product_title), product_title),
+            bounded(
+                "tags",
+                self.generate_product_tags(product_title, category),
+                self._mock_product_tags(product_title, category)
+            )
+        )
+        return {"description": description, "seo_title": seo_title, "tags": tags}
+    
+    def _parse_listing_copy(self, result: str) -> Optional[ListingCopy]:
+        """Validated listing copy from a model response, or None."""
+        # Models often wrap JSON in prose or a code fence
+        start, end = result.find("{"), result.rfind("}")
+        if start < 0 or end <= start:
+            return None
+        try:
+            return ListingCopy.model_validate(json.loads(result[start:end + 1]))
+        except (ValueError, ValidationError):
+            return None
+    
     async def generate_seo_title(self, product_title: str) -> str:
         """Generate SEO-optimized product title."""
         if not self.huggingface_token and not self.openai_key:
@@ -184,7 +351,7 @@ Return only the optimized title, nothing else."""
     async def generate_product_tags(self, product_title: str, category: str) -> List[str]:
         """Generate relevant product tags."""
         if not self.huggingface_token and not self.openai_key:
-            return [category.lower(), product_title.split()[0].lower()]
+            return self._mock_product_tags(product_title, category)
         
         try:
             prompt = f"""Generate 5-8 relevant tags for this product:
@@ -201,13 +368,13 @@ Return only a comma-separated list of tags, no explanations."""
                 tags = [tag.strip() for tag in result.split(",")]
                 # Clean up tags (remove extra text, quotes)
                 tags = [tag.strip('"').strip("'").strip() for tag in tags if tag.strip()]
-                return tags[:8] if tags else [category.lower(), product_title.split()[0].lower()]
+                return tags[:8] if tags else self._mock_product_tags(product_title, category)
             else:
-                return [category.lower(), product_title.split()[0].lower()]
+                return self._mock_product_tags(product_title, category)
             
         except Exception as e:
             logger.error(f"Error generating tags: {e}")
-            return [category.lower(), product_title.split()[0].lower()]
+            return self._mock_product_tags(product_title, category)
     
     async def generate_ad_caption(
         self,
@@ -238,7 +405,7 @@ Requirements:
 
 Return only the caption, nothing else."""
             
-            result = await self._call_ai_api(prompt, system_prompt, max_tokens=200)
+            result = await self._call_ai_api(prompt, system_prompt, max_tokens=200, priority=Priority.MARKETING)
             
             if result:
                 return result.strip()
@@ -276,7 +443,7 @@ Format:
 
 Return a structured script with timestamps."""
             
-            result = await self._call_ai_api(prompt, system_prompt, max_tokens=300)
+            result = await self._call_ai_api(prompt, system_prompt, max_tokens=300, priority=Priority.MARKETING)
             
             if result:
                 return result.strip()
@@ -298,6 +465,10 @@ Return a structured script with timestamps."""
         </ul>
         <p><strong>Order now and transform your daily routine!</strong></p>"""
     
+    def _mock_product_tags(self, title: str, category: str) -> List[str]:
+        """Mock product tags."""
+        return [category.lower(), title.split()[0].lower()]
+    
     def _mock_ad_caption(self, title: str, platform: str) -> str:
         """Mock ad caption."""
         if platform == "tiktok":
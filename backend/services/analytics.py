@@ -1,13 +1,17 @@
 """Analytics service for dashboard metrics."""
+import asyncio
 import logging
-from typing import Dict, Optional, List
+from typing import Any, Awaitable, Dict, Optional, List
 from datetime import datetime, timedelta
-import shopify
-import httpx
 import json
 
 from backend.models.schemas import DashboardMetrics
 from backend.config.settings import get_settings
+from backend.services.http_client import get_http_client
+from backend.services.shopify_client import get_shopify_client
+from backend.services.order_aggregator import OrderAggregator, ESTIMATED_COST_RATIO
+from backend.services.order_warehouse import get_order_warehouse
+from backend.services.cost_index import get_cost_index
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -22,18 +26,13 @@ class AnalyticsService:
         self.tiktok_access_token = settings.tiktok_access_token
         self.facebook_access_token = settings.facebook_access_token
         
-        # Initialize Shopify session
-        if self.shopify_store_name and self.shopify_access_token:
-            shopify.ShopifyResource.set_site(
-                f"https://{self.shopify_store_name}.myshopify.com/admin/api/2024-01"
-            )
-            self.session = shopify.Session(
-                f"{self.shopify_store_name}.myshopify.com",
-                "2024-01",
-                self.shopify_access_token
-            )
-        else:
-            self.session = None
+        # Shopify SDK calls run off the event loop via the shared client
+        self.shopify = get_shopify_client()
+        self.warehouse = get_order_warehouse()
+        self.cost_index = get_cost_index()
+        
+        # Set when any source fell back, so callers can avoid caching the result
+        self.degraded = False
     
     async def get_metrics(
         self,
@@ -64,11 +63,34 @@ class AnalyticsService:
             start_date = end_date - timedelta(days=30)
         
         try:
-            # Get sales data from Shopify
-            sales_data = await self._get_sales_data(start_date, end_date)
-            
-            # Get ad spend data
-            ad_spend = await self._get_ad_spend(start_date, end_date)
+            # Independent sources are fetched concurrently; a slow or failing
+            # source degrades to an empty value instead of delaying the rest
+            sales_data, ad_spend, conversion_rate, ad_performance = await asyncio.gather(
+                self._fetch_source(
+                    "sales data",
+                    self._get_sales_data(start_date, end_date),
+                    settings.metrics_sales_timeout,
+                    OrderAggregator(start_date, end_date).result()
+                ),
+                self._fetch_source(
+                    "ad spend",
+                    self._get_ad_spend(start_date, end_date),
+                    None,  # Each ad platform is bounded separately
+                    0.0
+                ),
+                self._fetch_source(
+                    "conversion rate",
+                    self._calculate_conversion_rate(start_date, end_date),
+                    settings.metrics_source_timeout,
+                    0.0
+                ),
+                self._fetch_source(
+                    "ad performance",
+                    self._get_ad_performance(start_date, end_date),
+                    settings.metrics_source_timeout,
+                    []
+                )
+            )
             
             # Calculate profit (simplified - would need actual cost data)
             total_sales = sales_data["total_sales"]
@@ -78,9 +100,6 @@ class AnalyticsService:
             # Calculate ROI
             roi = (total_profit / ad_spend * 100) if ad_spend > 0 else 0
             
-            # Calculate conversion rate (simplified)
-            conversion_rate = await self._calculate_conversion_rate(start_date, end_date)
-            
             # Calculate average order value
             total_orders = sales_data["total_orders"]
             avg_order_value = total_sales / total_orders if total_orders > 0 else 0
@@ -89,11 +108,8 @@ class AnalyticsService:
             top_products = sales_data["top_products"]
             
             # Get sales by date
-            sales_by_date = await self._get_sales_by_date(start_date, end_date)
-            profit_by_date = await self._get_profit_by_date(start_date, end_date)
-            
-            # Get ad performance
-            ad_performance = await self._get_ad_performance(start_date, end_date)
+            sales_by_date = sales_data["sales_by_date"]
+            profit_by_date = sales_data["profit_by_date"]
             
             return DashboardMetrics(
                 total_sales=total_sales,
@@ -111,72 +127,68 @@ class AnalyticsService:
             
         except Exception as e:
             logger.error(f"Error calculating metrics: {e}")
+            self.degraded = True
             return self._get_mock_metrics()
     
+    async def _fetch_source(
+        self,
+        name: str,
+        source: Awaitable,
+        timeout: Optional[float],
+        fallback: Any
+    ) -> Any:
+        """Await one metric source with a timeout, falling back on failure."""
+        try:
+            return await asyncio.wait_for(source, timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out getting {name} after {timeout}s, using fallback")
+        except Exception as e:
+            logger.error(f"Error getting {name}: {e}")
+        self.degraded = True
+        return fallback
+    
     async def _get_sales_data(
         self,
         start_date: datetime,
         end_date: datetime
     ) -> Dict:
-        """Get sales data from Shopify."""
-        if not self.session:
-            return self._get_mock_sales_data()
+        """Get sales totals, top products and daily series from the daily rollups."""
+        if not self.shopify.configured:
+            return self._get_mock_sales_data(start_date, end_date)
         
         try:
-            # Get orders in date range
-            orders = shopify.Order.find(
+            # The orchestrator bootstraps and maintains the warehouse; until
+            # its first sync completes, read the requested range live
+            if await self.warehouse.has_synced():
+                return await self.warehouse.rollups.summarize(start_date, end_date)
+        except Exception as e:
+            logger.error(f"Error reading order warehouse, falling back to Shopify: {e}")
+        
+        return await self._get_live_sales_data(start_date, end_date)
+    
+    async def _get_live_sales_data(
+        self,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Dict:
+        """Get sales totals, top products and daily series straight from Shopify."""
+        try:
+            # Stream every order in the date range, page by page
+            unit_costs = await self.cost_index.load()
+            aggregator = OrderAggregator(start_date, end_date, unit_costs=unit_costs)
+            async for order in self.shopify.iter_orders(
                 created_at_min=start_date.isoformat(),
                 created_at_max=end_date.isoformat(),
-                status="any",
-                limit=250
-            )
-            
-            total_sales = 0.0
-            total_cost = 0.0
-            total_orders = len(orders)
-            product_sales = {}
-            
-            for order in orders:
-                total_sales += float(order.total_price)
-                
-                # Calculate estimated cost (30% of sale price as example)
-                total_cost += float(order.total_price) * 0.30
-                
-                # Track product sales
-                for item in order.line_items:
-                    product_title = item.title
-                    quantity = item.quantity
-                    revenue = float(item.price) * quantity
-                    
-                    if product_title not in product_sales:
-                        product_sales[product_title] = {
-                            "name": product_title,
-                            "sales": 0,
-                            "revenue": 0.0,
-                            "quantity": 0
-                        }
-                    
-                    product_sales[product_title]["sales"] += revenue
-                    product_sales[product_title]["revenue"] += revenue
-                    product_sales[product_title]["quantity"] += quantity
+                status="any"
+            ):
+                aggregator.add(order)
             
-            # Sort top products
-            top_products = sorted(
-                product_sales.values(),
-                key=lambda x: x["revenue"],
-                reverse=True
-            )[:10]
-            
-            return {
-                "total_sales": total_sales,
-                "estimated_cost": total_cost,
-                "total_orders": total_orders,
-                "top_products": top_products
-            }
+            return aggregator.result()
             
         except Exception as e:
             logger.error(f"Error getting sales data: {e}")
-            return self._get_mock_sales_data()
+            self.degraded = True
+            return self._get_mock_sales_data(start_date, end_date)
     
     async def _get_ad_spend(
         self,
@@ -184,87 +196,118 @@ class AnalyticsService:
         end_date: datetime
     ) -> float:
         """Get total ad spend from TikTok and Facebook."""
-        total_spend = 0.0
+        daily_spend = await self._get_daily_ad_spend(start_date, end_date)
+        return sum(daily_spend.values())
+    
+    async def _get_daily_ad_spend(
+        self,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Dict[str, float]:
+        """Get ad spend per day across TikTok and Facebook."""
+        daily_spend: Dict[str, float] = {}
         
-        try:
-            # Get TikTok ad spend
-            if self.tiktok_access_token:
-                tiktok_spend = await self._get_tiktok_ad_spend(start_date, end_date)
-                total_spend += tiktok_spend
-            
-            # Get Facebook ad spend
-            if self.facebook_access_token:
-                facebook_spend = await self._get_facebook_ad_spend(start_date, end_date)
-                total_spend += facebook_spend
-                
-        except Exception as e:
-            logger.error(f"Error getting ad spend: {e}")
+        # Query the ad platforms concurrently, each under its own timeout
+        sources = []
+        if self.tiktok_access_token:
+            sources.append(self._fetch_source(
+                "TikTok ad spend",
+                self._get_tiktok_ad_spend(start_date, end_date),
+                settings.metrics_source_timeout,
+                {}
+            ))
+        if self.facebook_access_token:
+            sources.append(self._fetch_source(
+                "Facebook ad spend",
+                self._get_facebook_ad_spend(start_date, end_date),
+                settings.metrics_source_timeout,
+                {}
+            ))
+        
+        for platform_spend in await asyncio.gather(*sources):
+            for day, spend in platform_spend.items():
+                daily_spend[day] = daily_spend.get(day, 0.0) + spend
         
-        return total_spend
+        return daily_spend
+    
+    async def refresh_ad_spend_rollup(self, days: int = 7):
+        """Record recent per-day ad spend into the daily rollups."""
+        end_date = datetime.utcnow()
+        start_date = end_date - timedelta(days=days)
+        daily_spend = await self._get_daily_ad_spend(start_date, end_date)
+        await self.warehouse.rollups.record_ad_spend(daily_spend)
     
     async def _get_tiktok_ad_spend(
         self,
         start_date: datetime,
         end_date: datetime
-    ) -> float:
-        """Get TikTok ad spend."""
+    ) -> Dict[str, float]:
+        """Get TikTok ad spend per day."""
         try:
-            async with httpx.AsyncClient() as client:
-                url = "https://business-api.tiktok.com/open_api/v1.3/report/integrated/get/"
-                headers = {
-                    "Access-Token": self.tiktok_access_token,
-                    "Content-Type": "application/json"
-                }
-                
-                payload = {
-                    "advertiser_id": settings.tiktok_advertiser_id,
-                    "start_date": start_date.strftime("%Y-%m-%d"),
-                    "end_date": end_date.strftime("%Y-%m-%d"),
-                    "metrics": ["spend"]
-                }
-                
-                response = await client.post(url, headers=headers, json=payload, timeout=30.0)
-                response.raise_for_status()
-                data = response.json()
-                
-                # Parse response
-                return float(data.get("data", {}).get("sum", {}).get("spend", 0))
-                
+            url = "https://business-api.tiktok.com/open_api/v1.3/report/integrated/get/"
+            headers = {
+                "Access-Token": self.tiktok_access_token,
+                "Content-Type": "application/json"
+            }
+            
+            payload = {
+                "advertiser_id": settings.tiktok_advertiser_id,
+                "start_date": start_date.strftime("%Y-%m-%d"),
+                "end_date": end_date.strftime("%Y-%m-%d"),
+                "dimensions": ["stat_time_day"],
+                "metrics": ["spend"]
+            }
+            
+            client = get_http_client(url)
+            response = await client.post(url, headers=headers, json=payload, timeout=30.0)
+            response.raise_for_status()
+            data = response.json()
+            
+            # Parse response (stat_time_day is "YYYY-MM-DD HH:MM:SS")
+            daily_spend = {}
+            for row in data.get("data", {}).get("list", []):
+                day = row.get("dimensions", {}).get("stat_time_day", "")[:10]
+                daily_spend[day] = daily_spend.get(day, 0.0) + float(row.get("metrics", {}).get("spend", 0))
+            
+            return daily_spend
+            
         except Exception as e:
             logger.error(f"Error getting TikTok ad spend: {e}")
-            return 0.0
+            return {}
     
     async def _get_facebook_ad_spend(
         self,
         start_date: datetime,
         end_date: datetime
-    ) -> float:
-        """Get Facebook ad spend."""
+    ) -> Dict[str, float]:
+        """Get Facebook ad spend per day."""
         try:
-            async with httpx.AsyncClient() as client:
-                url = f"https://graph.facebook.com/v18.0/{settings.facebook_ad_account_id}/insights"
-                params = {
-                    "time_range": json.dumps({
-                        "since": start_date.strftime("%Y-%m-%d"),
-                        "until": end_date.strftime("%Y-%m-%d")
-                    }),
-                    "fields": "spend",
-                    "access_token": self.facebook_access_token
-                }
-                
-                response = await client.get(url, params=params, timeout=30.0)
-                response.raise_for_status()
-                data = response.json()
-                
-                total_spend = 0.0
-                for insight in data.get("data", []):
-                    total_spend += float(insight.get("spend", 0))
-                
-                return total_spend
-                
+            url = f"https://graph.facebook.com/v18.0/{settings.facebook_ad_account_id}/insights"
+            params = {
+                "time_range": json.dumps({
+                    "since": start_date.strftime("%Y-%m-%d"),
+                    "until": end_date.strftime("%Y-%m-%d")
+                }),
+                "time_increment": 1,
+                "fields": "spend",
+                "access_token": self.facebook_access_token
+            }
+            
+            client = get_http_client(url)
+            response = await client.get(url, params=params, timeout=30.0)
+            response.raise_for_status()
+            data = response.json()
+            
+            daily_spend = {}
+            for insight in data.get("data", []):
+                day = insight.get("date_start", "")
+                daily_spend[day] = daily_spend.get(day, 0.0) + float(insight.get("spend", 0))
+            
+            return daily_spend
+            
         except Exception as e:
             logger.error(f"Error getting Facebook ad spend: {e}")
-            return 0.0
+            return {}
     
     async def _calculate_conversion_rate(
         self,
@@ -276,56 +319,6 @@ class AnalyticsService:
         # Conversion rate = (Orders / Sessions) * 100
         return 2.5  # Mock 2.5% conversion rate
     
-    async def _get_sales_by_date(
-        self,
-        start_date: datetime,
-        end_date: datetime
-    ) -> List[Dict]:
-        """Get sales broken down by date."""
-        if not self.session:
-            return self._get_mock_sales_by_date(start_date, end_date)
-        
-        try:
-            sales_by_date = {}
-            current_date = start_date
-            
-            while current_date <= end_date:
-                sales_by_date[current_date.strftime("%Y-%m-%d")] = 0.0
-                current_date += timedelta(days=1)
-            
-            orders = shopify.Order.find(
-                created_at_min=start_date.isoformat(),
-                created_at_max=end_date.isoformat(),
-                status="any",
-                limit=250
-            )
-            
-            for order in orders:
-                order_date = datetime.fromisoformat(order.created_at.replace("Z", "+00:00"))
-                date_key = order_date.strftime("%Y-%m-%d")
-                if date_key in sales_by_date:
-                    sales_by_date[date_key] += float(order.total_price)
-            
-            return [{"date": date, "sales": sales} for date, sales in sales_by_date.items()]
-            
-        except Exception as e:
-            logger.error(f"Error getting sales by date: {e}")
-            return self._get_mock_sales_by_date(start_date, end_date)
-    
-    async def _get_profit_by_date(
-        self,
-        start_date: datetime,
-        end_date: datetime
-    ) -> List[Dict]:
-        """Get profit broken down by date."""
-        sales_by_date = await self._get_sales_by_date(start_date, end_date)
-        
-        # Calculate profit (simplified - 70% margin)
-        return [
-            {"date": item["date"], "profit": item["sales"] * 0.70}
-            for item in sales_by_date
-        ]
-    
     async def _get_ad_performance(
         self,
         start_date: datetime,
@@ -368,8 +361,13 @@ class AnalyticsService:
             ad_performance=[]
         )
     
-    def _get_mock_sales_data(self) -> Dict:
+    def _get_mock_sales_data(
+        self,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Dict:
         """Get mock sales data."""
+        sales_by_date = self._get_mock_sales_by_date(start_date, end_date)
         return {
             "total_sales": 5000.0,
             "estimated_cost": 1500.0,
@@ -377,6 +375,11 @@ class AnalyticsService:
             "top_products": [
                 {"name": "Product 1", "sales": 1200.0, "revenue": 1200.0, "quantity": 30},
                 {"name": "Product 2", "sales": 900.0, "revenue": 900.0, "quantity": 25}
+            ],
+            "sales_by_date": sales_by_date,
+            "profit_by_date": [
+                {"date": item["date"], "profit": item["sales"] * (1 - ESTIMATED_COST_RATIO)}
+                for item in sales_by_date
             ]
         }
     
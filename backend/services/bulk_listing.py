@@ -0,0 +1,132 @@
+"""Pipelined bulk listing of products into Shopify."""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from backend.models.schemas import Product
+from backend.config.settings import get_settings
+from backend.services.http_client import get_media_client
+from backend.services.shopify_manager import ShopifyManager
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Shopify accepts at most this many images per listing
+MAX_LISTING_IMAGES = 5
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class BulkListingPipeline:
+    """
+    Lists many products through three overlapping stages.
+
+    AI content generation, image validation and Shopify creation each run
+    their own pool of workers, connected by bounded queues. While one
+    product is being created in Shopify the next ones are already having
+    copy written and images checked, so throughput is set by the slowest
+    stage instead of the sum of all three. Full queues push back on the
+    stages before them. Shopify creates go through the same process-wide
+    rate limiter as every other product create.
+    """
+    
+    def __init__(self, shopify_manager: Optional[ShopifyManager] = None):
+        self.shopify_manager = shopify_manager or ShopifyManager()
+    
+    async def run(self, products: List[Product]) -> List[Dict]:
+        """
+        List the given products.
+
+        Returns:
+            One result per product, in input order, with the listing or the error
+        """
+        results: List[Optional[Dict]] = [None] * len(products)
+        queue_size = settings.bulk_listing_queue_size
+        content_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        image_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        create_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        
+        async def feed():
+            for index, product in enumerate(products):
+                await content_queue.put({"index": index, "product": product})
+            await content_queue.put(_DONE)
+        
+        await asyncio.gather(
+            feed(),
+            self._run_stage(content_queue, image_queue, self._generate_content,
+                            settings.bulk_listing_content_workers, results),
+            self._run_stage(image_queue, create_queue, self._validate_images,
+                            settings.bulk_listing_image_workers, results),
+            self._run_stage(create_queue, None, self._create,
+                            settings.bulk_listing_create_workers, results)
+        )
+        
+        listed = sum(1 for result in results if result and result["status"] == "success")
+        logger.info(f"Bulk listing finished: {listed} of {len(products)} products listed")
+        return results
+    
+    async def _run_stage(
+        self,
+        inbox: asyncio.Queue,
+        outbox: Optional[asyncio.Queue],
+        handler: Callable[[Dict], Awaitable[None]],
+        workers: int,
+        results: List[Optional[Dict]]
+    ):
+        """Run a stage's workers until its input is exhausted, then close its output."""
+        async def worker():
+            while True:
+                item = await inbox.get()
+                if item is _DONE:
+                    # Let the sibling workers see the end marker too
+                    await inbox.put(_DONE)
+                    return
+                
+                product = item["product"]
+                try:
+                    await handler(item)
+                except Exception as e:
+                    logger.error(f"Bulk listing failed for {product.id or product.title}: {e}")
+                    results[item["index"]] = {"product_id": product.id, "status": "error", "error": str(e)}
+                    continue
+                
+                if outbox is not None:
+                    await outbox.put(item)
+                else:
+                    results[item["index"]] = {"product_id": product.id, "status": "success", "product": item["listing"]}
+        
+        await asyncio.gather(*(worker() for _ in range(max(1, workers))))
+        if outbox is not None:
+            await outbox.put(_DONE)
+    
+    async def _generate_content(self, item: Dict):
+        """Stage 1: AI-written description, SEO title and tags."""
+        item["content"] = await self.shopify_manager.generate_listing_content(item["product"])
+    
+    async def _validate_images(self, item: Dict):
+        """Stage 2: drop image URLs that do not resolve to an image."""
+        product = item["product"]
+        urls = product.images[:MAX_LISTING_IMAGES]
+        checks = await asyncio.gather(*(self._image_ok(url) for url in urls))
+        valid = [url for url, ok in zip(urls, checks) if ok]
+        if len(valid) < len(urls):
+            logger.warning(f"Dropped {len(urls) - len(valid)} broken images from {product.id or product.title}")
+        item["product"] = product.model_copy(update={"images": valid})
+    
+    async def _create(self, item: Dict):
+        """Stage 3: rate-limited Shopify product creation."""
+        item["listing"] = await self.shopify_manager.create_listing(item["product"], item["content"])
+    
+    async def _image_ok(self, url: str) -> bool:
+        """Whether the URL serves an image."""
+        try:
+            client = get_media_client()
+            response = await client.head(url, timeout=10.0, follow_redirects=True)
+            if response.status_code == 405:
+                # Some CDNs refuse HEAD; a ranged GET costs about the same
+                response = await client.get(url, headers={"Range": "bytes=0-0"}, timeout=10.0, follow_redirects=True)
+            return response.status_code < 400 and response.headers.get("content-type", "").startswith("image/")
+        except Exception as e:
+            logger.warning(f"Could not validate image {url}: {e}")
+            return False
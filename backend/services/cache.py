@@ -0,0 +1,134 @@
+"""In-process caches for expensive API responses."""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DegradedResult(Exception):
+    """
+    Raised by a computation whose result is only a fallback.
+
+    The cache keeps serving the last good value for the key instead; the
+    fallback is returned (but not stored) only when there is none.
+    """
+    
+    def __init__(self, value: Any):
+        super().__init__("degraded result")
+        self.value = value
+
+
+class StaleResultError(Exception):
+    """Raised when a refresh is degraded and the last good value is older than max_stale."""
+    
+    def __init__(self, age: float):
+        super().__init__(f"last good value is {age:.0f}s old")
+        self.age = age
+
+
+class SWRCache:
+    """
+    Async TTL cache with single-flight and stale-while-revalidate.
+
+    Fresh entries (younger than ttl) are returned directly. Stale entries
+    (younger than ttl + stale_ttl) are returned immediately while one
+    background task recomputes them. Concurrent misses for the same key
+    share a single in-flight computation, which by default keeps running
+    when its callers are cancelled; with cancel_orphaned it is cancelled
+    once every caller waiting on it has been. A degraded refresh keeps
+    the last good value only while it is younger than max_stale; past
+    that, StaleResultError is raised instead.
+    """
+    
+    def __init__(
+        self,
+        ttl: float,
+        stale_ttl: float = 0.0,
+        max_entries: int = 128,
+        cancel_orphaned: bool = False,
+        max_stale: Optional[float] = None
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_stale = max_stale
+        self.cancel_orphaned = cancel_orphaned
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+    
+    async def get(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Get the cached value for key, computing it if needed."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age < self.ttl:
+                self._entries.move_to_end(key)
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self._refresh(key, compute)
+                return value
+        
+        # Shield so a cancelled caller does not cancel the shared computation
+        task = self._refresh(key, compute)
+        if not self.cancel_orphaned:
+            return await asyncio.shield(task)
+        
+        # Count waiters so the last one to be cancelled cancels the computation
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                if not task.done():
+                    task.cancel()
+    
+    def invalidate(self, key: Hashable = None):
+        """Drop one entry, or everything when no key is given."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+    
+    def _refresh(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Start (or join) the single in-flight computation for key."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._compute(key, compute))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return task
+    
+    async def _compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Run the computation and store its result."""
+        try:
+            value = await compute()
+        except DegradedResult as e:
+            entry = self._entries.get(key)
+            if entry is None:
+                return e.value
+            
+            age = time.monotonic() - entry[1]
+            if self.max_stale is not None and age > self.max_stale:
+                # Keep failing until a good refresh replaces the entry
+                raise StaleResultError(age) from None
+            logger.warning(f"Degraded refresh for {key}, keeping last good value ({age:.0f}s old)")
+            return entry[0]
+        
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+    
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        """Clear the in-flight marker and surface background failures."""
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Cache refresh failed for {key}: {task.exception()}")
@@ -0,0 +1,278 @@
+"""Persistent product catalog kept in sync with Shopify."""
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+from sqlalchemy import select, update, func, bindparam
+
+from backend.models.database import CatalogProductRecord, SyncState, get_sessionmaker, upsert, bulk_upsert
+from backend.models.schemas import Product, ProductPage, ProductStatus
+from backend.services.shopify_client import get_shopify_client, SHOPIFY_MAX_PAGE_SIZE
+from backend.services.order_warehouse import parse_timestamp
+
+logger = logging.getLogger(__name__)
+
+SYNC_NAME = "shopify_products"
+
+# Shopify product status -> catalog status
+SHOPIFY_STATUSES = {
+    "active": ProductStatus.ACTIVE,
+    "draft": ProductStatus.PAUSED,
+    "archived": ProductStatus.DELETED,
+}
+
+SORT_COLUMNS = {
+    "margin": CatalogProductRecord.margin,
+    "score": CatalogProductRecord.score,
+    "updated_at": CatalogProductRecord.updated_at,
+}
+
+
+class ProductCatalog:
+    """
+    Local catalog of discovered and listed products.
+
+    Discovery results are upserted in bulk, listings update their status
+    and Shopify id, and sync_from_shopify() pulls products changed in the
+    store since the last cursor (updated_at_min), page by page. Views and
+    the orchestrator read from here with indexed filters and pagination
+    instead of re-fetching from suppliers or Shopify.
+    """
+    
+    def __init__(self):
+        self.shopify = get_shopify_client()
+        self._lock = asyncio.Lock()
+    
+    async def upsert_products(self, products: List[Product], status: Optional[ProductStatus] = None) -> int:
+        """
+        Insert or refresh products.
+
+        Without a status, existing rows keep theirs and new rows start as
+        discovered, so re-discovering a listed product does not reset it.
+        """
+        now = datetime.utcnow()
+        # One row per id: a multi-row upsert may not touch the same row twice
+        rows = {}
+        for product in products:
+            if not product.id:
+                continue
+            row = product.model_dump(exclude={"status", "created_at"})
+            row["created_at"] = product.created_at or now
+            row["updated_at"] = now
+            if status is not None:
+                row["status"] = status.value
+            rows[product.id] = row
+        
+        if rows:
+            async with get_sessionmaker()() as session:
+                async with session.begin():
+                    await bulk_upsert(
+                        session, CatalogProductRecord, list(rows.values()), ["id"], insert_only=["created_at"]
+                    )
+        return len(rows)
+    
+    async def mark_listed(self, product_id: str, shopify_product_id: Optional[str]):
+        """Record that a catalog product is now listed in Shopify."""
+        async with get_sessionmaker()() as session:
+            async with session.begin():
+                await session.execute(
+                    update(CatalogProductRecord)
+                    .where(CatalogProductRecord.id == product_id)
+                    .values(
+                        status=ProductStatus.LISTED.value,
+                        shopify_product_id=shopify_product_id,
+                        updated_at=datetime.utcnow()
+                    )
+                )
+    
+    async def update_prices(self, prices: Dict[str, Tuple[float, float]]):
+        """Record new retail prices as (price, landed cost) per product id, refreshing profit and margin."""
+        if not prices:
+            return
+        
+        now = datetime.utcnow()
+        rows = [
+            {
+                "row_id": product_id,
+                "price": price,
+                "cost": cost,
+                "profit": price - cost,
+                "margin": (price - cost) / price if price > 0 else 0.0,
+                "updated_at": now
+            }
+            for product_id, (price, cost) in prices.items()
+        ]
+        table = CatalogProductRecord.__table__
+        async with get_sessionmaker()() as session:
+            async with session.begin():
+                await session.execute(update(table).where(table.c.id == bindparam("row_id")), rows)
+    
+    async def get(self, product_id: str) -> Optional[Product]:
+        """A single catalog product."""
+        async with get_sessionmaker()() as session:
+            record = await session.get(CatalogProductRecord, product_id)
+        return self._to_product(record) if record else None
+    
+    async def list_products(
+        self,
+        status: Optional[ProductStatus] = None,
+        category: Optional[str] = None,
+        supplier_id: Optional[str] = None,
+        min_margin: Optional[float] = None,
+        sort: str = "margin",
+        limit: int = 50,
+        offset: int = 0
+    ) -> ProductPage:
+        """
+        One page of catalog products, best first.
+
+        Args:
+            status: Only products in this status
+            category: Only products in this category
+            supplier_id: Only products from this supplier
+            min_margin: Minimum profit margin (0.0-1.0)
+            sort: "margin", "score" or "updated_at", descending
+            limit: Page size
+            offset: Products to skip
+
+        Returns:
+            The page and the total number of matching products
+        """
+        filters = []
+        if status is not None:
+            filters.append(CatalogProductRecord.status == status.value)
+        if category:
+            filters.append(CatalogProductRecord.category == category)
+        if supplier_id:
+            filters.append(CatalogProductRecord.supplier_id == supplier_id)
+        if min_margin is not None:
+            filters.append(CatalogProductRecord.margin >= min_margin)
+        
+        order = SORT_COLUMNS.get(sort, CatalogProductRecord.margin)
+        async with get_sessionmaker()() as session:
+            total = (await session.execute(
+                select(func.count(CatalogProductRecord.id)).where(*filters)
+            )).scalar_one()
+            records = (await session.execute(
+                select(CatalogProductRecord)
+                .where(*filters)
+                .order_by(order.desc().nulls_last(), CatalogProductRecord.id)
+                .limit(limit)
+                .offset(offset)
+            )).scalars().all()
+        
+        return ProductPage(
+            items=[self._to_product(record) for record in records],
+            total=total,
+            limit=limit,
+            offset=offset
+        )
+    
+    async def sync_from_shopify(self) -> int:
+        """
+        Pull store products created or updated since the last sync.
+
+        Returns:
+            Number of products written to the catalog
+        """
+        if not self.shopify.configured:
+            return 0
+        
+        async with self._lock:
+            async with get_sessionmaker()() as session:
+                state = await session.get(SyncState, SYNC_NAME)
+            cursor = state.cursor if state else None
+            
+            params = {
+                "fields": "id,title,body_html,product_type,status,variants,images,updated_at",
+                "order": "updated_at asc"
+            }
+            if cursor:
+                params["updated_at_min"] = cursor
+            
+            synced = 0
+            batch = []
+            async for shopify_product in self.shopify.iter_products(**params):
+                batch.append(shopify_product)
+                if len(batch) >= SHOPIFY_MAX_PAGE_SIZE:
+                    cursor = await self._store_shopify_batch(batch, cursor)
+                    synced += len(batch)
+                    batch = []
+            
+            if batch:
+                cursor = await self._store_shopify_batch(batch, cursor)
+                synced += len(batch)
+            
+            logger.info(f"Product catalog synced {synced} Shopify products")
+            return synced
+    
+    async def _store_shopify_batch(self, shopify_products: List[Dict], cursor: Optional[str]) -> Optional[str]:
+        """Upsert the store-owned fields of a batch; returns the advanced cursor."""
+        newest = parse_timestamp(cursor) if cursor else None
+        rows = {}
+        for shopify_product in shopify_products:
+            variants = shopify_product.get("variants") or [{}]
+            updated_at = parse_timestamp(shopify_product["updated_at"])
+            # Listed products carry their supplier product id as the SKU
+            row_id = variants[0].get("sku") or f"shopify-{shopify_product['id']}"
+            # Products sharing a SKU collapse to the most recently updated one,
+            # since a multi-row upsert may not touch the same row twice
+            if row_id in rows and rows[row_id]["updated_at"] > updated_at:
+                continue
+            rows[row_id] = {
+                "id": row_id,
+                "title": shopify_product.get("title", ""),
+                "description": shopify_product.get("body_html") or "",
+                "price": float(variants[0].get("price") or 0),
+                "category": shopify_product.get("product_type") or "",
+                "images": [image["src"] for image in shopify_product.get("images", []) if image.get("src")],
+                "status": SHOPIFY_STATUSES.get(shopify_product.get("status"), ProductStatus.LISTED).value,
+                "shopify_product_id": str(shopify_product["id"]),
+                "updated_at": updated_at
+            }
+            if newest is None or updated_at > newest:
+                newest = updated_at
+                cursor = shopify_product["updated_at"]
+        
+        async with get_sessionmaker()() as session:
+            async with session.begin():
+                await bulk_upsert(session, CatalogProductRecord, list(rows.values()), ["id"])
+                await session.execute(upsert(
+                    SyncState,
+                    [{"name": SYNC_NAME, "cursor": cursor, "synced_at": datetime.utcnow()}],
+                    ["name"]
+                ))
+        return cursor
+    
+    def _to_product(self, record: CatalogProductRecord) -> Product:
+        """Catalog row as an API product."""
+        return Product(
+            id=record.id,
+            title=record.title,
+            description=record.description,
+            price=record.price,
+            cost=record.cost,
+            margin=record.margin,
+            profit=record.profit,
+            score=record.score,
+            currency=record.currency,
+            category=record.category,
+            images=record.images or [],
+            supplier_id=record.supplier_id,
+            supplier_name=record.supplier_name,
+            supplier_url=record.supplier_url,
+            shipping_info=record.shipping_info or {},
+            status=ProductStatus(record.status),
+            created_at=record.created_at
+        )
+
+
+_catalog: Optional[ProductCatalog] = None
+
+
+def get_product_catalog() -> ProductCatalog:
+    """Get product catalog singleton."""
+    global _catalog
+    if _catalog is None:
+        _catalog = ProductCatalog()
+    return _catalog
@@ -0,0 +1,107 @@
+"""SKU to landed-cost index used for profit figures."""
+import asyncio
+import logging
+from typing import Dict, Optional
+from datetime import datetime
+from sqlalchemy import select, update
+
+from backend.models.database import (
+    ProductCostRecord, OrderLineItemRecord, get_sessionmaker, upsert
+)
+from backend.services.metrics_rollup import MetricsRollup
+
+logger = logging.getLogger(__name__)
+
+
+class SKUCostIndex:
+    """
+    Landed unit cost per SKU, persisted in product_costs.
+
+    Costs are recorded when a product is listed (its SKU is the supplier
+    product id) and kept in memory as a plain dict, so analytics resolves
+    each line item's cost with one lookup. SKUs without a recorded cost
+    fall back to ESTIMATED_COST_RATIO of the sale price.
+    """
+    
+    def __init__(self):
+        self.costs: Dict[str, float] = {}
+        self.rollups = MetricsRollup()
+        self._loaded = False
+        self._lock = asyncio.Lock()
+    
+    async def load(self) -> Dict[str, float]:
+        """Load the index from the database once."""
+        if self._loaded:
+            return self.costs
+        
+        async with self._lock:
+            if not self._loaded:
+                async with get_sessionmaker()() as session:
+                    rows = (await session.execute(
+                        select(ProductCostRecord.sku, ProductCostRecord.cost)
+                    )).all()
+                self.costs.update({sku: cost for sku, cost in rows})
+                self._loaded = True
+        return self.costs
+    
+    def get(self, sku: Optional[str]) -> Optional[float]:
+        """Landed unit cost of a SKU, if known."""
+        return self.costs.get(sku) if sku else None
+    
+    async def record(
+        self,
+        sku: str,
+        cost: float,
+        supplier_id: Optional[str] = None,
+        shipping_cost: float = 0.0
+    ):
+        """
+        Store the landed cost of a SKU (shipping_cost is the part of it paid for shipping).
+
+        When the SKU had no recorded cost, its warehoused line items take
+        this cost and their days' rollups are rebuilt, replacing the
+        price-based estimate. Later cost changes (e.g. supplier price
+        updates) apply to newly synced orders only; past line items keep
+        the cost they were bought at.
+        """
+        await self.load()
+        previous = self.costs.get(sku)
+        if previous == cost:
+            return
+        
+        row = {
+            "sku": sku,
+            "cost": cost,
+            "shipping_cost": shipping_cost,
+            "updated_at": datetime.utcnow()
+        }
+        if supplier_id is not None:
+            row["supplier_id"] = supplier_id
+        
+        async with get_sessionmaker()() as session:
+            async with session.begin():
+                await session.execute(upsert(ProductCostRecord, [row], ["sku"]))
+                if previous is None:
+                    uncosted = (OrderLineItemRecord.sku == sku, OrderLineItemRecord.unit_cost.is_(None))
+                    days = (await session.execute(
+                        select(OrderLineItemRecord.created_date).where(*uncosted).distinct()
+                    )).scalars().all()
+                    if days:
+                        await session.execute(
+                            update(OrderLineItemRecord).where(*uncosted).values(unit_cost=cost)
+                        )
+                        await self.rollups.rebuild_days(session, days)
+        
+        self.costs[sku] = cost
+        logger.info(f"Recorded landed cost {cost:.2f} for SKU {sku}")
+
+
+_cost_index: Optional[SKUCostIndex] = None
+
+
+def get_cost_index() -> SKUCostIndex:
+    """Get SKU cost index singleton."""
+    global _cost_index
+    if _cost_index is None:
+        _cost_index = SKUCostIndex()
+    return _cost_index
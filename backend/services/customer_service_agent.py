@@ -2,11 +2,14 @@
 import logging
 from typing import List, Optional, Dict
 from datetime import datetime
-import httpx
 
 from backend.models.schemas import CustomerMessage
 from backend.config.settings import get_settings
-import shopify
+from backend.services.http_client import get_http_client
+from backend.services.shopify_client import get_shopify_client
+from backend.services.llm_scheduler import (
+    Priority, RateLimitedError, get_llm_scheduler, estimate_tokens, retry_after_seconds
+)
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -27,22 +30,12 @@ class CustomerServiceAgent:
         if not self.huggingface_token and not self.openai_key:
             logger.warning("No AI API key configured (Hugging Face or OpenAI), using mock responses")
         
-        # Initialize Shopify session
-        if self.shopify_store_name and self.shopify_access_token:
-            shopify.ShopifyResource.set_site(
-                f"https://{self.shopify_store_name}.myshopify.com/admin/api/2024-01"
-            )
-            self.session = shopify.Session(
-                f"{self.shopify_store_name}.myshopify.com",
-                "2024-01",
-                self.shopify_access_token
-            )
-        else:
-            self.session = None
+        # Shopify SDK calls run off the event loop via the shared client
+        self.shopify = get_shopify_client()
     
     async def get_messages(self, answered: bool = False) -> List[CustomerMessage]:
         """Get customer service messages from Shopify."""
-        if not self.session:
+        if not self.shopify.configured:
             logger.warning("Shopify not configured, returning mock messages")
             return self._get_mock_messages()
         
@@ -137,11 +130,20 @@ Requirements:
 
 Generate an appropriate response:"""
             
-            # Use Hugging Face or OpenAI
+            # Use Hugging Face or OpenAI, ahead of any queued catalog copy
             if self.use_huggingface:
-                response_text = await self._call_huggingface(prompt, system_prompt, max_tokens=200)
+                provider, call = "huggingface", lambda: self._call_huggingface(prompt, system_prompt, max_tokens=200)
             else:
-                response_text = await self._call_openai(prompt, system_prompt, max_tokens=200)
+                provider, call = "openai", lambda: self._call_openai(prompt, system_prompt, max_tokens=200)
+            try:
+                response_text = await get_llm_scheduler(provider).run(
+                    call,
+                    priority=Priority.CUSTOMER_REPLY,
+                    tokens=estimate_tokens(system_prompt, prompt) + 200
+                )
+            except RateLimitedError as e:
+                logger.error(f"{provider} still rate limited after retries: {e}")
+                response_text = ""
             
             if response_text:
                 return response_text.strip()
@@ -157,38 +159,42 @@ Generate an appropriate response:"""
         try:
             full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
             
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                headers = {
-                    "Authorization": f"Bearer {self.huggingface_token}",
-                    "Content-Type": "application/json"
-                }
-                
-                payload = {
-                    "inputs": full_prompt,
-                    "parameters": {
-                        "max_new_tokens": max_tokens,
-                        "temperature": 0.7,
-                        "top_p": 0.9,
-                        "return_full_text": False
-                    }
+            headers = {
+                "Authorization": f"Bearer {self.huggingface_token}",
+                "Content-Type": "application/json"
+            }
+            
+            payload = {
+                "inputs": full_prompt,
+                "parameters": {
+                    "max_new_tokens": max_tokens,
+                    "temperature": 0.7,
+                    "top_p": 0.9,
+                    "return_full_text": False
                 }
-                
-                api_url = f"https://api-inference.huggingface.co/models/{self.huggingface_model}"
-                response = await client.post(api_url, headers=headers, json=payload)
-                response.raise_for_status()
-                data = response.json()
-                
-                if isinstance(data, list) and len(data) > 0:
-                    if "generated_text" in data[0]:
-                        return data[0]["generated_text"].strip()
-                    elif "text" in data[0]:
-                        return data[0]["text"].strip()
-                
-                if isinstance(data, dict) and "generated_text" in data:
-                    return data["generated_text"].strip()
-                
-                return str(data).strip()
-                
+            }
+            
+            api_url = f"https://api-inference.huggingface.co/models/{self.huggingface_model}"
+            client = get_http_client(api_url)
+            response = await client.post(api_url, headers=headers, json=payload, timeout=60.0)
+            if response.status_code == 429:
+                raise RateLimitedError(retry_after_seconds(response.headers))
+            response.raise_for_status()
+            data = response.json()
+            
+            if isinstance(data, list) and len(data) > 0:
+                if "generated_text" in data[0]:
+                    return data[0]["generated_text"].strip()
+                elif "text" in data[0]:
+                    return data[0]["text"].strip()
+            
+            if isinstance(data, dict) and "generated_text" in data:
+                return data["generated_text"].strip()
+            
+            return str(data).strip()
+            
+        except RateLimitedError:
+            raise
         except Exception as e:
             logger.error(f"Error calling Hugging Face API: {e}")
             return ""
@@ -196,6 +202,7 @@ Generate an appropriate response:"""
     async def _call_openai(self, prompt: str, system_prompt: str = "", max_tokens: int = 200) -> str:
         """Call OpenAI API (fallback)."""
         try:
+            import openai
             from openai import AsyncOpenAI
             
             client = AsyncOpenAI(api_key=self.openai_key)
@@ -205,26 +212,31 @@ Generate an appropriate response:"""
                 messages.append({"role": "system", "content": system_prompt})
             messages.append({"role": "user", "content": prompt})
             
-            response = await client.chat.completions.create(
-                model=settings.openai_model,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=max_tokens
-            )
+            try:
+                response = await client.chat.completions.create(
+                    model=settings.openai_model,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=max_tokens
+                )
+            except openai.RateLimitError as e:
+                raise RateLimitedError(retry_after_seconds(e.response.headers)) from e
             
             return response.choices[0].message.content.strip()
             
+        except RateLimitedError:
+            raise
         except Exception as e:
             logger.error(f"Error calling OpenAI API: {e}")
             return ""
     
     async def _get_order_context(self, order_id: str) -> str:
         """Get order context for customer service response."""
-        if not self.session:
+        if not self.shopify.configured:
             return ""
         
         try:
-            order = shopify.Order.find(order_id)
+            order = await self.shopify.find_order(order_id)
             return f"Order #{order.order_number} - Total: ${order.total_price} - Status: {order.fulfillment_status}"
         except:
             return ""
@@ -0,0 +1,143 @@
+"""Micro-batching of Hugging Face text-generation requests."""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from backend.config.settings import get_settings
+from backend.services.http_client import get_http_client
+from backend.services.llm_scheduler import (
+    Priority, RateLimitedError, get_llm_scheduler, estimate_tokens, retry_after_seconds
+)
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# (prompt, priority, waiting caller)
+PendingRequest = Tuple[str, Priority, asyncio.Future]
+
+
+def generated_text(output: Any) -> str:
+    """Text of one text-generation output, whatever shape the API returned."""
+    if isinstance(output, list):
+        output = output[0] if output else {}
+    if isinstance(output, dict):
+        if "generated_text" in output:
+            return output["generated_text"].strip()
+        if "text" in output:
+            return output["text"].strip()
+    return str(output).strip()
+
+
+class HuggingFaceBatcher:
+    """
+    Sends concurrent generation requests to the Inference API in batches.
+
+    Requests with the same generation parameters are held for up to
+    window seconds, or until max_batch_size of them are waiting, and then
+    sent as one call with a list of inputs. Each output is routed back to
+    the caller that asked for it. A batch is one request against the
+    provider's rate limits but is charged the tokens of all its prompts,
+    and is scheduled in the most urgent lane among its members.
+    """
+    
+    def __init__(self, token: str, model: str, max_batch_size: int, window: float):
+        self.token = token
+        self.model = model
+        self.max_batch_size = max(1, max_batch_size)
+        self.window = window
+        self.api_url = f"https://api-inference.huggingface.co/models/{model}"
+        self._pending: Dict[int, List[PendingRequest]] = {}
+        self._timers: Dict[int, asyncio.TimerHandle] = {}
+        self._sending: Set[asyncio.Task] = set()
+    
+    async def generate(self, prompt: str, max_tokens: int, priority: Priority = Priority.CATALOG) -> str:
+        """Generate a completion for prompt as part of the next batch."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        batch = self._pending.setdefault(max_tokens, [])
+        batch.append((prompt, priority, future))
+        if len(batch) >= self.max_batch_size:
+            self._flush(max_tokens)
+        elif len(batch) == 1:
+            self._timers[max_tokens] = loop.call_later(self.window, self._flush, max_tokens)
+        
+        return await future
+    
+    def _flush(self, max_tokens: int):
+        """Send whatever is waiting for these parameters."""
+        timer = self._timers.pop(max_tokens, None)
+        if timer is not None:
+            timer.cancel()
+        
+        # Callers that gave up (e.g. timed out) are dropped from the batch
+        batch = [request for request in self._pending.pop(max_tokens, []) if not request[2].done()]
+        if batch:
+            task = asyncio.create_task(self._send(batch, max_tokens))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+    
+    async def _send(self, batch: List[PendingRequest], max_tokens: int):
+        """Run one batched call through the scheduler and resolve its callers."""
+        prompts = [prompt for prompt, _, _ in batch]
+        try:
+            outputs = await get_llm_scheduler("huggingface").run(
+                lambda: self._request(prompts, max_tokens),
+                priority=min(priority for _, priority, _ in batch),
+                tokens=sum(estimate_tokens(prompt) + max_tokens for prompt in prompts)
+            )
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, _, future), output in zip(batch, outputs):
+            if not future.done():
+                future.set_result(output)
+    
+    async def _request(self, prompts: List[str], max_tokens: int) -> List[str]:
+        """One Inference API call for all prompts."""
+        headers = {
+            "Authorization": f"Bearer {self.token}",
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "inputs": prompts if len(prompts) > 1 else prompts[0],
+            "parameters": {
+                "max_new_tokens": max_tokens,
+                "temperature": 0.7,
+                "top_p": 0.9,
+                "return_full_text": False
+            }
+        }
+        
+        client = get_http_client(self.api_url)
+        response = await client.post(self.api_url, headers=headers, json=payload, timeout=60.0)
+        if response.status_code == 429:
+            raise RateLimitedError(retry_after_seconds(response.headers))
+        response.raise_for_status()
+        data = response.json()
+        
+        if len(prompts) == 1:
+            return [generated_text(data)]
+        if not isinstance(data, list) or len(data) != len(prompts):
+            raise ValueError(f"expected {len(prompts)} outputs from batched call, got {data!r:.200}")
+        logger.debug(f"Hugging Face batch of {len(prompts)} completed")
+        return [generated_text(output) for output in data]
+
+
+_hf_batcher: Optional[HuggingFaceBatcher] = None
+
+
+def get_hf_batcher() -> HuggingFaceBatcher:
+    """Get Hugging Face batcher singleton."""
+    global _hf_batcher
+    if _hf_batcher is None:
+        _hf_batcher = HuggingFaceBatcher(
+            settings.huggingface_api_token,
+            settings.huggingface_model,
+            max_batch_size=settings.huggingface_max_batch_size,
+            window=settings.huggingface_batch_window
+        )
+    return _hf_batcher
@@ -0,0 +1,121 @@
+"""Shared pooled HTTP clients for outbound API calls."""
+import logging
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import httpx
+
+from backend.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HTTPClientRegistry:
+    """
+    Registry of long-lived httpx clients keyed by upstream host.
+
+    Each host gets its own connection pool so keep-alive connections are
+    reused across requests and one busy upstream cannot starve the others.
+    HTTP/2 is negotiated via ALPN, so hosts without support fall back to
+    HTTP/1.1 on the same client.
+
+    Per-host pools are only for the fixed set of API hosts. Images and
+    other media come from arbitrary supplier and CDN hosts, so they share
+    one media client whose pool is capped across all hosts, instead of
+    accumulating a pool per host for the life of the process.
+    """
+    
+    def __init__(self):
+        self.http2 = settings.http2_enabled and HTTP2_AVAILABLE
+        self.limits = httpx.Limits(
+            max_connections=settings.http_max_connections_per_host,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry
+        )
+        self.media_limits = httpx.Limits(
+            max_connections=settings.http_media_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry
+        )
+        self.timeout = httpx.Timeout(settings.http_timeout)
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._media: Optional[httpx.AsyncClient] = None
+        
+        if settings.http2_enabled and not HTTP2_AVAILABLE:
+            logger.warning("h2 package not installed, HTTP/2 disabled for outbound clients")
+    
+    def get(self, url: str) -> httpx.AsyncClient:
+        """Get the pooled client for the host of the given URL."""
+        parts = urlsplit(url)
+        key = f"{parts.scheme}://{parts.netloc}"
+        
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self.limits,
+                timeout=self.timeout
+            )
+            self._clients[key] = client
+            logger.debug(f"Opened HTTP client pool for {key}")
+        
+        return client
+    
+    def media(self) -> httpx.AsyncClient:
+        """Get the client shared by media downloads from any host."""
+        if self._media is None or self._media.is_closed:
+            self._media = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self.media_limits,
+                timeout=self.timeout
+            )
+        return self._media
+    
+    async def aclose(self):
+        """Close every pooled client."""
+        clients = list(self._clients.values())
+        if self._media is not None:
+            clients.append(self._media)
+        self._clients.clear()
+        self._media = None
+        
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.error(f"Error closing HTTP client: {e}")
+
+
+_registry: Optional[HTTPClientRegistry] = None
+
+
+def get_http_registry() -> HTTPClientRegistry:
+    """Get HTTP client registry singleton."""
+    global _registry
+    if _registry is None:
+        _registry = HTTPClientRegistry()
+    return _registry
+
+
+def get_http_client(url: str) -> httpx.AsyncClient:
+    """Get the shared client for the host of the given URL."""
+    return get_http_registry().get(url)
+
+
+def get_media_client() -> httpx.AsyncClient:
+    """Get the shared client for image and media downloads."""
+    return get_http_registry().media()
+
+
+async def close_http_clients():
+    """Close all pooled clients and reset the registry."""
+    global _registry
+    if _registry is not None:
+        await _registry.aclose()
+        _registry = None
@@ -0,0 +1,183 @@
+"""Perceptual-hash deduplication of supplier offers sharing a product photo."""
+import asyncio
+import io
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+from PIL import Image
+from sqlalchemy import select
+
+from backend.models.database import ImageHashRecord, get_sessionmaker, bulk_upsert
+from backend.models.schemas import Product
+from backend.config.settings import get_settings
+from backend.services.http_client import get_media_client
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Rows per IN (...) lookup of cached hashes
+HASH_LOOKUP_BATCH = 500
+
+
+def dhash(data: bytes, hash_size: int = 8) -> int:
+    """
+    Difference hash of an image.
+
+    The image is reduced to a (hash_size + 1) x hash_size grayscale
+    thumbnail and each bit records whether a pixel is brighter than its
+    right-hand neighbour, so resizing, recompression and small edits leave
+    most bits unchanged.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        pixels = list(
+            image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS).getdata()
+        )
+    
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    """Burkhard-Keller tree for nearest-neighbour lookups by Hamming distance."""
+    
+    def __init__(self):
+        self._root: Optional[Tuple[int, object, Dict[int, tuple]]] = None
+    
+    def add(self, key: int, value: object):
+        """Insert a hash with an associated value."""
+        node = (key, value, {})
+        if self._root is None:
+            self._root = node
+            return
+        
+        current = self._root
+        while True:
+            distance = hamming(key, current[0])
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
+    
+    def find(self, key: int, max_distance: int) -> Optional[object]:
+        """Value of the closest stored hash within max_distance, if any."""
+        if self._root is None:
+            return None
+        
+        best = None
+        best_distance = max_distance + 1
+        pending = [self._root]
+        while pending:
+            node_key, value, children = pending.pop()
+            distance = hamming(key, node_key)
+            if distance < best_distance:
+                best, best_distance = value, distance
+            # Triangle inequality: only subtrees within the radius can match
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    pending.append(child)
+        return best
+
+
+class ImageDeduplicator:
+    """
+    Collapses offers whose main photo is the same item to the cheapest one.
+
+    Each product's first image is hashed with dhash; hashes are persisted
+    in image_hashes so every URL is downloaded and hashed only once.
+    Offers are visited cheapest first and looked up in a BK-tree, so an
+    offer within max_distance bits of one already kept is a duplicate.
+    """
+    
+    def __init__(self, max_distance: Optional[int] = None):
+        self.max_distance = settings.image_dedup_max_distance if max_distance is None else max_distance
+    
+    async def dedupe(self, products: List[Product]) -> List[Product]:
+        """Drop offers that duplicate a cheaper offer's image, keeping the input order."""
+        urls = {product.images[0] for product in products if product.images}
+        if len(urls) < 2:
+            return products
+        
+        hashes = await self.hash_images(urls)
+        index = BKTree()
+        dropped = set()
+        for product in sorted(products, key=lambda p: p.cost):
+            image_hash = hashes.get(product.images[0]) if product.images else None
+            if image_hash is None:
+                continue
+            
+            duplicate_of = index.find(image_hash, self.max_distance)
+            if duplicate_of is not None:
+                logger.info(f"Dropping {product.id}: same image as cheaper offer {duplicate_of.id}")
+                dropped.add(id(product))
+                continue
+            index.add(image_hash, product)
+        
+        return [product for product in products if id(product) not in dropped]
+    
+    async def hash_images(self, urls: Iterable[str]) -> Dict[str, int]:
+        """Hashes for the given image URLs, from the cache or freshly computed."""
+        urls = list(urls)
+        hashes = await self._load_cached(urls)
+        
+        missing = [url for url in urls if url not in hashes]
+        if missing:
+            semaphore = asyncio.Semaphore(settings.image_dedup_concurrency)
+            
+            async def compute(url: str) -> Optional[int]:
+                async with semaphore:
+                    return await self._hash_url(url)
+            
+            computed = await asyncio.gather(*(compute(url) for url in missing))
+            fresh = {url: value for url, value in zip(missing, computed) if value is not None}
+            await self._store(fresh)
+            hashes.update(fresh)
+        
+        return hashes
+    
+    async def _hash_url(self, url: str) -> Optional[int]:
+        """Download and hash one image; None if it cannot be read."""
+        try:
+            client = get_media_client()
+            response = await client.get(url, timeout=10.0, follow_redirects=True)
+            response.raise_for_status()
+            # Decoding and resizing are CPU-bound, keep them off the event loop
+            return await asyncio.to_thread(dhash, response.content)
+        except Exception as e:
+            logger.warning(f"Could not hash image {url}: {e}")
+            return None
+    
+    async def _load_cached(self, urls: List[str]) -> Dict[str, int]:
+        """Previously computed hashes for the given URLs."""
+        hashes = {}
+        async with get_sessionmaker()() as session:
+            for start in range(0, len(urls), HASH_LOOKUP_BATCH):
+                rows = (await session.execute(
+                    select(ImageHashRecord.url, ImageHashRecord.hash)
+                    .where(ImageHashRecord.url.in_(urls[start:start + HASH_LOOKUP_BATCH]))
+                )).all()
+                hashes.update({url: int(value, 16) for url, value in rows})
+        return hashes
+    
+    async def _store(self, hashes: Dict[str, int]):
+        """Persist newly computed hashes."""
+        if not hashes:
+            return
+        
+        now = datetime.utcnow()
+        rows = [
+            {"url": url, "hash": f"{value:016x}", "hashed_at": now}
+            for url, value in hashes.items()
+        ]
+        async with get_sessionmaker()() as session:
+            async with session.begin():
+                await bulk_upsert(session, ImageHashRecord, rows, ["url"])
@@ -0,0 +1,143 @@
+"""Persistent content-addressed cache of LLM responses."""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from backend.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Eviction trims the cache to this fraction of max_entries, so it runs rarely
+EVICTION_TARGET = 0.9
+
+
+def response_key(provider: str, model: str, system_prompt: str, prompt: str, max_tokens: int) -> str:
+    """SHA-256 of everything that determines a model response."""
+    payload = json.dumps([provider, model, system_prompt, prompt, max_tokens], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    On-disk LLM response cache in a local SQLite file.
+
+    Entries are keyed by response_key(), so the same prompt to the same
+    model is only ever paid for once, across restarts. Entries expire
+    after ttl seconds, and once the cache holds more than max_entries the
+    least recently used ones are evicted down to EVICTION_TARGET of it.
+    The file is local to this host, independent of the application
+    database.
+    """
+    
+    def __init__(self, path: str, max_entries: int, ttl: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._count = 0
+    
+    async def get(self, key: str) -> Optional[str]:
+        """Cached response for key, if present and not expired."""
+        try:
+            return await asyncio.to_thread(self._get, key)
+        except Exception as e:
+            logger.error(f"Error reading LLM cache: {e}")
+            return None
+    
+    async def set(self, key: str, response: str):
+        """Store a response."""
+        try:
+            await asyncio.to_thread(self._set, key, response)
+        except Exception as e:
+            logger.error(f"Error writing LLM cache: {e}")
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the cache file and create the table on first use."""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_accessed_at ON responses (accessed_at)")
+            conn.commit()
+            self._count = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            self._conn = conn
+        return self._conn
+    
+    def _get(self, key: str) -> Optional[str]:
+        """Blocking lookup, run on a worker thread."""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            
+            response, created_at = row
+            now = time.time()
+            if now - created_at > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                self._count -= 1
+                return None
+            
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            return response
+    
+    def _set(self, key: str, response: str):
+        """Blocking insert with eviction, run on a worker thread."""
+        with self._lock:
+            conn = self._connect()
+            now = time.time()
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO responses (key, response, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, response, now, now)
+            ).rowcount
+            if inserted:
+                self._count += 1
+            else:
+                conn.execute(
+                    "UPDATE responses SET response = ?, created_at = ?, accessed_at = ? WHERE key = ?",
+                    (response, now, now, key)
+                )
+            
+            if self._count > self.max_entries:
+                # Drop expired entries first, then the least recently used
+                conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY accessed_at LIMIT "
+                    "MAX(0, (SELECT COUNT(*) FROM responses) - ?))",
+                    (int(self.max_entries * EVICTION_TARGET),)
+                )
+                self._count = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            conn.commit()
+
+
+_llm_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Get LLM response cache singleton."""
+    global _llm_cache
+    if _llm_cache is None:
+        _llm_cache = LLMResponseCache(
+            settings.llm_cache_path,
+            max_entries=settings.llm_cache_max_entries,
+            ttl=settings.llm_cache_ttl
+        )
+    return _llm_cache
@@ -0,0 +1,200 @@
+"""Rate-limit-aware scheduling of LLM provider calls."""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from enum import IntEnum
+from typing import Awaitable, Callable, Dict, List, Mapping, Optional, Tuple, TypeVar
+
+from backend.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+T = TypeVar("T")
+
+
+class Priority(IntEnum):
+    """Scheduling lanes, lowest value served first."""
+    CUSTOMER_REPLY = 0
+    MARKETING = 1
+    CATALOG = 2
+
+
+class RateLimitedError(Exception):
+    """Raised by a provider call that was rejected with HTTP 429."""
+    
+    def __init__(self, retry_after: Optional[float] = None):
+        super().__init__(f"rate limited, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    """Retry-After header value in seconds, if present and numeric."""
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return sum(len(text) for text in texts) // 4 + 1
+
+
+class TokenBucket:
+    """Per-minute limit refilled continuously."""
+    
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+    
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount is available."""
+        self._refill(now)
+        # A request larger than the bucket only needs a full one
+        deficit = min(amount, self.capacity) - self.level
+        return deficit / self.rate if deficit > 0 else 0.0
+    
+    def consume(self, amount: float, now: float):
+        """Take amount from the bucket."""
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+    
+    def _refill(self, now: float):
+        """Add what accrued since the last update."""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class ProviderScheduler:
+    """
+    Admits calls to one LLM provider within its rate limits.
+
+    Each call waits in a priority queue until a concurrency slot, one
+    request from the requests-per-minute bucket and its estimated tokens
+    from the tokens-per-minute bucket are all available, so the provider
+    is driven at its limit without tripping it. Higher-priority lanes are
+    always admitted first. A call that still gets a 429 pauses the whole
+    provider for the Retry-After period and is queued again instead of
+    failing.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_concurrency: int,
+        max_retries: int = 3
+    ):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self._waiting: List[Tuple[int, int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._active = 0
+        self._paused_until = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+    
+    async def run(self, call: Callable[[], Awaitable[T]], priority: Priority, tokens: int) -> T:
+        """
+        Run call once the provider's limits allow it.
+
+        Args:
+            call: Makes the provider request; raises RateLimitedError on 429
+            priority: Scheduling lane
+            tokens: Estimated prompt plus completion tokens
+
+        Returns:
+            The call's result
+        """
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(priority, tokens)
+            try:
+                return await call()
+            except RateLimitedError as e:
+                self._pause(e.retry_after or settings.llm_rate_limit_backoff)
+                if attempt == self.max_retries:
+                    raise
+                logger.warning(f"{self.name} rate limited, requeueing ({attempt + 1}/{self.max_retries})")
+            finally:
+                self._release()
+    
+    async def _acquire(self, priority: Priority, tokens: int):
+        """Wait for admission in the given lane."""
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (int(priority), next(self._sequence), tokens, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just as the caller gave up; hand the slot back
+                self._release()
+            raise
+    
+    def _release(self):
+        """Free a concurrency slot."""
+        self._active -= 1
+        self._dispatch()
+    
+    def _pause(self, seconds: float):
+        """Admit nothing for the given time."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+    
+    def _dispatch(self):
+        """Admit waiting calls in priority order while limits allow."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        while self._waiting:
+            _, _, tokens, future = self._waiting[0]
+            if future.cancelled():
+                heapq.heappop(self._waiting)
+                continue
+            if self._active >= self.max_concurrency:
+                # The next release dispatches again
+                return
+            
+            now = time.monotonic()
+            wait = max(
+                self._paused_until - now,
+                self.requests.wait_time(1, now) if self.requests else 0.0,
+                self.tokens.wait_time(tokens, now) if self.tokens else 0.0
+            )
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            
+            heapq.heappop(self._waiting)
+            if self.requests:
+                self.requests.consume(1, now)
+            if self.tokens:
+                self.tokens.consume(tokens, now)
+            self._active += 1
+            future.set_result(None)
+
+
+_schedulers: Dict[str, ProviderScheduler] = {}
+
+
+def get_llm_scheduler(provider: str) -> ProviderScheduler:
+    """Get the scheduler singleton for a provider ("openai" or "huggingface")."""
+    scheduler = _schedulers.get(provider)
+    if scheduler is None:
+        scheduler = ProviderScheduler(
+            provider,
+            requests_per_minute=getattr(settings, f"{provider}_requests_per_minute"),
+            tokens_per_minute=getattr(settings, f"{provider}_tokens_per_minute"),
+            max_concurrency=settings.ai_max_concurrency,
+            max_retries=settings.llm_rate_limit_retries
+        )
+        _schedulers[provider] = scheduler
+    return scheduler
@@ -0,0 +1,220 @@
+"""Materialized daily rollups behind the dashboard metrics."""
+import logging
+from typing import Dict, Iterable, Optional
+from datetime import datetime
+from sqlalchemy import select, delete, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.database import (
+    OrderRecord, OrderLineItemRecord, DailySalesRollup, DailyProductRollup, ProductCostRecord,
+    SyncState, get_sessionmaker, upsert, bulk_upsert
+)
+from backend.services.order_aggregator import ESTIMATED_COST_RATIO, date_keys
+
+logger = logging.getLogger(__name__)
+
+# Versioned so existing rollups are rebuilt once when the cost model changes
+ROLLUP_STATE_NAME = "daily_rollups:gross_profit"
+
+
+class MetricsRollup:
+    """
+    Daily per-store and per-product sales, cost, ad spend and profit.
+
+    Rows are rebuilt only for the days touched by newly synced orders, so
+    a 30-, 90- or 365-day dashboard is a sum over at most a few hundred
+    precomputed rows rather than a scan of every order. Line item cost is
+    quantity times the unit cost stored on the line item when its order
+    was synced, or an ESTIMATED_COST_RATIO share of the price for items
+    without one, so rebuilding an old day keeps its historical costs.
+    Daily profit is gross (sales minus cost), as on the live path; ad
+    spend is stored alongside it and only subtracted from total profit.
+    """
+    
+    async def rebuild_days(self, session: AsyncSession, days: Optional[Iterable[str]] = None):
+        """
+        Recompute rollups from the warehouse for the given days.
+
+        Runs inside the caller's transaction; days=None rebuilds everything.
+        """
+        order_filter = []
+        item_filter = []
+        if days is not None:
+            days = sorted(set(days))
+            if not days:
+                return
+            order_filter.append(OrderRecord.created_date.in_(days))
+            item_filter.append(OrderLineItemRecord.created_date.in_(days))
+        
+        revenue = func.sum(OrderLineItemRecord.price * OrderLineItemRecord.quantity)
+        item_cost = func.sum(OrderLineItemRecord.quantity * func.coalesce(
+            OrderLineItemRecord.unit_cost, OrderLineItemRecord.price * ESTIMATED_COST_RATIO
+        ))
+        
+        order_rows = (await session.execute(
+            select(
+                OrderRecord.created_date,
+                func.count(OrderRecord.id),
+                func.sum(OrderRecord.total_price)
+            )
+            .where(*order_filter)
+            .group_by(OrderRecord.created_date)
+        )).all()
+        
+        product_rows = (await session.execute(
+            select(
+                OrderLineItemRecord.created_date,
+                OrderLineItemRecord.title,
+                func.max(OrderLineItemRecord.sku),
+                revenue,
+                func.sum(OrderLineItemRecord.quantity),
+                item_cost
+            )
+            .where(*item_filter)
+            .group_by(OrderLineItemRecord.created_date, OrderLineItemRecord.title)
+        )).all()
+        
+        quantity_by_day: Dict[str, int] = {}
+        cost_by_day: Dict[str, float] = {}
+        product_rollups = []
+        for day, title, sku, sales, quantity, cost in product_rows:
+            sales = float(sales or 0)
+            cost = float(cost or 0)
+            quantity = int(quantity or 0)
+            quantity_by_day[day] = quantity_by_day.get(day, 0) + quantity
+            cost_by_day[day] = cost_by_day.get(day, 0.0) + cost
+            product_rollups.append({
+                "day": day,
+                "product": title,
+                "sku": sku,
+                "sales": sales,
+                "quantity": quantity,
+                "cost": cost,
+                "profit": sales - cost
+            })
+        
+        sales_rollups = []
+        for day, orders, sales in order_rows:
+            sales = float(sales or 0)
+            sales_rollups.append({
+                "day": day,
+                "orders": int(orders or 0),
+                "sales": sales,
+                "quantity": quantity_by_day.get(day, 0),
+                "cost": cost_by_day.get(day, 0.0),
+                "profit": sales - cost_by_day.get(day, 0.0)
+            })
+        
+        # Product rows are replaced so renamed or removed items disappear
+        product_delete = delete(DailyProductRollup)
+        if days is not None:
+            product_delete = product_delete.where(DailyProductRollup.day.in_(days))
+        await session.execute(product_delete)
+        if product_rollups:
+            await bulk_upsert(session, DailyProductRollup, product_rollups, ["day", "product"])
+        
+        # Day rows keep their recorded ad spend; only order-derived columns change
+        if sales_rollups:
+            await bulk_upsert(session, DailySalesRollup, sales_rollups, ["day"])
+    
+    async def ensure_backfilled(self):
+        """Build rollups for every warehoused day the first time they are needed."""
+        async with get_sessionmaker()() as session:
+            async with session.begin():
+                if await session.get(SyncState, ROLLUP_STATE_NAME):
+                    return
+                logger.info("Backfilling daily rollups from order warehouse")
+                # Items warehoused before unit costs were stored take the best cost known now
+                await session.execute(
+                    update(OrderLineItemRecord)
+                    .where(OrderLineItemRecord.unit_cost.is_(None))
+                    .values(unit_cost=(
+                        select(ProductCostRecord.cost)
+                        .where(ProductCostRecord.sku == OrderLineItemRecord.sku)
+                        .scalar_subquery()
+                    ))
+                )
+                await self.rebuild_days(session)
+                # Days with ad spend but no orders are not rebuilt
+                await session.execute(
+                    update(DailySalesRollup).values(profit=DailySalesRollup.sales - DailySalesRollup.cost)
+                )
+                await session.execute(upsert(
+                    SyncState,
+                    [{"name": ROLLUP_STATE_NAME, "synced_at": datetime.utcnow()}],
+                    ["name"]
+                ))
+    
+    async def record_ad_spend(self, daily_spend: Dict[str, float]):
+        """Store per-day ad spend."""
+        if not daily_spend:
+            return
+        
+        rows = [{"day": day, "ad_spend": spend} for day, spend in daily_spend.items()]
+        async with get_sessionmaker()() as session:
+            async with session.begin():
+                await session.execute(upsert(DailySalesRollup, rows, ["day"]))
+    
+    async def summarize(self, start_date: datetime, end_date: datetime, top_n: int = 10) -> Dict:
+        """Sales totals, top products and daily series for a window."""
+        keys = date_keys(start_date, end_date)
+        if not keys:
+            keys = [start_date.strftime("%Y-%m-%d")]
+        in_window = DailySalesRollup.day.between(keys[0], keys[-1])
+        product_in_window = DailyProductRollup.day.between(keys[0], keys[-1])
+        product_sales = func.sum(DailyProductRollup.sales)
+        
+        async with get_sessionmaker()() as session:
+            day_rows = (await session.execute(
+                select(
+                    DailySalesRollup.day,
+                    DailySalesRollup.orders,
+                    DailySalesRollup.sales,
+                    DailySalesRollup.cost,
+                    DailySalesRollup.profit
+                ).where(in_window)
+            )).all()
+            
+            product_rows = (await session.execute(
+                select(DailyProductRollup.product, product_sales, func.sum(DailyProductRollup.quantity))
+                .where(product_in_window)
+                .group_by(DailyProductRollup.product)
+                .order_by(product_sales.desc())
+                .limit(top_n)
+            )).all()
+        
+        sales_by_date = {key: 0.0 for key in keys}
+        profit_by_date = {key: 0.0 for key in keys}
+        total_orders = 0
+        total_sales = 0.0
+        total_cost = 0.0
+        for day, orders, sales, cost, profit in day_rows:
+            total_orders += orders or 0
+            total_sales += sales or 0.0
+            total_cost += cost or 0.0
+            if day in sales_by_date:
+                sales_by_date[day] = sales or 0.0
+                profit_by_date[day] = profit or 0.0
+        
+        return {
+            "total_sales": total_sales,
+            "estimated_cost": total_cost,
+            "total_orders": total_orders,
+            "top_products": [
+                {
+                    "name": product,
+                    "sales": float(sales or 0),
+                    "revenue": float(sales or 0),
+                    "quantity": int(quantity or 0)
+                }
+                for product, sales, quantity in product_rows
+            ],
+            "sales_by_date": [
+                {"date": date, "sales": sales}
+                for date, sales in sales_by_date.items()
+            ],
+            "profit_by_date": [
+                {"date": date, "profit": profit}
+                for date, profit in profit_by_date.items()
+            ]
+        }
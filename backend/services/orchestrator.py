@@ -10,6 +10,12 @@ from backend.services.ad_manager import AdManager
 from backend.services.order_fulfillment import OrderFulfillmentService
 from backend.services.customer_service_agent import CustomerServiceAgent
 from backend.services.analytics import AnalyticsService
+from backend.services.order_warehouse import get_order_warehouse
+from backend.services.seen_products import get_seen_product_index
+from backend.services.repricing import RepricingEngine
+from backend.services.supplier_sync import SupplierChangeFeed
+from backend.services.catalog import get_product_catalog
+from backend.models.schemas import ProductStatus
 from backend.config.settings import get_settings
 
 logger = logging.getLogger(__name__)
@@ -29,6 +35,11 @@ class AutomationOrchestrator:
         self.order_fulfillment = OrderFulfillmentService()
         self.customer_service = CustomerServiceAgent()
         self.analytics = AnalyticsService()
+        self.order_warehouse = get_order_warehouse()
+        self.seen_products = get_seen_product_index()
+        self.repricing = RepricingEngine()
+        self.supplier_feed = SupplierChangeFeed()
+        self.catalog = get_product_catalog()
         
         self.running = False
         self.tasks = []
@@ -43,7 +54,11 @@ class AutomationOrchestrator:
             asyncio.create_task(self._product_discovery_loop()),
             asyncio.create_task(self._order_fulfillment_loop()),
             asyncio.create_task(self._customer_service_loop()),
-            asyncio.create_task(self._ad_optimization_loop())
+            asyncio.create_task(self._ad_optimization_loop()),
+            asyncio.create_task(self._order_sync_loop()),
+            asyncio.create_task(self._repricing_loop()),
+            asyncio.create_task(self._supplier_sync_loop()),
+            asyncio.create_task(self._catalog_sync_loop())
         ]
         
         logger.info("Automation orchestrator initialized and running")
@@ -75,14 +90,22 @@ class AutomationOrchestrator:
                 
                 logger.info("Running product discovery...")
                 
-                # Discover trending products
+                # Discover trending products not listed on an earlier run
                 products = await self.product_discovery.discover_products(
                     min_margin=settings.min_profit_margin,
-                    limit=5
+                    limit=5,
+                    exclude=self.seen_products.contains
                 )
+                await self.catalog.upsert_products(products)
                 
-                # Add top products to store
-                for product in products[:3]:  # Add top 3
+                # Add the best unlisted catalog products to store
+                candidates = await self.catalog.list_products(
+                    status=ProductStatus.DISCOVERED,
+                    min_margin=settings.min_profit_margin,
+                    sort="score",
+                    limit=3
+                )
+                for product in candidates.items:
                     try:
                         await self.shopify_manager.add_product(product)
                         logger.info(f"Added product: {product.title}")
@@ -194,6 +217,90 @@ class AutomationOrchestrator:
                 logger.error(f"Error in ad optimization loop: {e}")
                 await asyncio.sleep(3600)
     
+    async def _order_sync_loop(self):
+        """Continuous loop keeping the order warehouse and daily rollups current."""
+        logger.info("Starting order sync loop")
+        
+        while self.running:
+            try:
+                # The first (full-history) sync starts right away; the
+                # dashboard reads Shopify live until it has completed
+                if await self.order_warehouse.has_synced() or not self.analytics.shopify.configured:
+                    await asyncio.sleep(settings.order_sync_interval)
+                
+                if not self.analytics.shopify.configured:
+                    continue
+                
+                synced = await self.order_warehouse.sync()
+                if synced:
+                    logger.info(f"Synced {synced} orders into warehouse")
+                
+                await self.analytics.refresh_ad_spend_rollup()
+                
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in order sync loop: {e}")
+                await asyncio.sleep(settings.order_sync_interval)
+    
+    async def _repricing_loop(self):
+        """Continuous loop repricing the listed catalog."""
+        logger.info("Starting repricing loop")
+        
+        while self.running:
+            try:
+                await asyncio.sleep(settings.repricing_interval)
+                
+                if not settings.repricing_enabled:
+                    continue
+                
+                logger.info("Repricing catalog...")
+                updated = await self.repricing.run()
+                if updated:
+                    logger.info(f"Updated prices of {len(updated)} variants")
+                
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in repricing loop: {e}")
+                await asyncio.sleep(settings.repricing_interval)
+    
+    async def _supplier_sync_loop(self):
+        """Continuous loop applying supplier price and stock changes."""
+        logger.info("Starting supplier sync loop")
+        
+        while self.running:
+            try:
+                await asyncio.sleep(settings.supplier_sync_interval)
+                
+                changes = await self.supplier_feed.sync()
+                if changes:
+                    logger.info(f"Applied supplier changes to {len(changes)} products")
+                
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in supplier sync loop: {e}")
+                await asyncio.sleep(settings.supplier_sync_interval)
+    
+    async def _catalog_sync_loop(self):
+        """Continuous loop keeping the product catalog in sync with Shopify."""
+        logger.info("Starting catalog sync loop")
+        
+        while self.running:
+            try:
+                await asyncio.sleep(settings.catalog_sync_interval)
+                
+                synced = await self.catalog.sync_from_shopify()
+                if synced:
+                    logger.info(f"Synced {synced} Shopify products into catalog")
+                
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in catalog sync loop: {e}")
+                await asyncio.sleep(settings.catalog_sync_interval)
+    
     async def _create_product_ad(self, product):
         """Auto-create ad campaign for a product."""
         try:
@@ -0,0 +1,183 @@
+"""Single-pass aggregation of Shopify orders into dashboard figures."""
+from typing import Dict, Iterable, List, Mapping, Optional
+from datetime import datetime, timedelta
+import numpy as np
+
+# Estimated product cost as a share of the sale price
+ESTIMATED_COST_RATIO = 0.30
+
+# Orders or line items buffered before a vectorized reduction
+CHUNK_SIZE = 50000
+
+
+def date_keys(start_date: datetime, end_date: datetime) -> List[str]:
+    """Daily "YYYY-MM-DD" keys covering the window."""
+    keys = []
+    current_date = start_date
+    while current_date <= end_date:
+        keys.append(current_date.strftime("%Y-%m-%d"))
+        current_date += timedelta(days=1)
+    return keys
+
+
+class OrderAggregator:
+    """
+    Accumulates totals, top products and daily sales/profit series.
+
+    Orders are fed one at a time with add() and buffered as plain columns
+    (totals, dates, line item titles, prices, quantities). Each chunk is
+    reduced with NumPy: daily bucketing by searchsorted over the window's
+    date keys, per-product sums by unique/bincount, so large windows
+    aggregate without per-item dict updates and memory stays bounded by
+    the chunk size.
+
+    Cost is per line item: quantity times the SKU's landed cost from
+    unit_costs, or ESTIMATED_COST_RATIO of the price for unknown SKUs.
+    """
+    
+    def __init__(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        top_n: int = 10,
+        chunk_size: int = CHUNK_SIZE,
+        unit_costs: Optional[Mapping[str, float]] = None
+    ):
+        self.top_n = top_n
+        self.unit_costs = unit_costs or {}
+        self.chunk_size = chunk_size
+        self.total_sales = 0.0
+        self.total_cost = 0.0
+        self.total_orders = 0
+        
+        self.dates = date_keys(start_date, end_date)
+        self._date_index = np.asarray(self.dates, dtype="U10")
+        self.sales_by_date = np.zeros(len(self.dates))
+        self.cost_by_date = np.zeros(len(self.dates))
+        self.product_revenue: Dict[str, float] = {}
+        self.product_quantity: Dict[str, int] = {}
+        
+        self._reset_buffers()
+    
+    def add(self, order: Dict):
+        """Add a single order (Shopify REST JSON shape) to the running totals."""
+        self._order_totals.append(order.get("total_price") or 0)
+        created_at = order.get("created_at") or ""
+        self._order_dates.append(created_at)
+        
+        for item in order.get("line_items", ()):
+            self._item_dates.append(created_at)
+            self._item_unit_costs.append(self.unit_costs.get(item.get("sku"), np.nan))
+            self._item_titles.append(item.get("title") or "")
+            self._item_prices.append(item.get("price") or 0)
+            self._item_quantities.append(item.get("quantity") or 0)
+        
+        if len(self._order_totals) >= self.chunk_size or len(self._item_titles) >= self.chunk_size:
+            self._flush()
+    
+    def add_many(self, orders: Iterable[Dict]):
+        """Add a batch of orders."""
+        for order in orders:
+            self.add(order)
+    
+    def top_products(self) -> List[Dict]:
+        """Products with the highest revenue."""
+        self._flush()
+        if not self.product_revenue:
+            return []
+        
+        names = list(self.product_revenue)
+        revenue = np.fromiter(self.product_revenue.values(), dtype=np.float64, count=len(names))
+        
+        # Partial selection of the top N, then order just those
+        n = min(self.top_n, len(names))
+        top = np.argpartition(-revenue, n - 1)[:n]
+        top = top[np.argsort(-revenue[top], kind="stable")]
+        
+        return [
+            {
+                "name": names[i],
+                "sales": float(revenue[i]),
+                "revenue": float(revenue[i]),
+                "quantity": self.product_quantity[names[i]]
+            }
+            for i in top
+        ]
+    
+    def result(self) -> Dict:
+        """Final aggregate for the window."""
+        self._flush()
+        profit_by_date = self.sales_by_date - self.cost_by_date
+        
+        return {
+            "total_sales": self.total_sales,
+            "estimated_cost": self.total_cost,
+            "total_orders": self.total_orders,
+            "top_products": self.top_products(),
+            "sales_by_date": [
+                {"date": date, "sales": float(sales)}
+                for date, sales in zip(self.dates, self.sales_by_date)
+            ],
+            "profit_by_date": [
+                {"date": date, "profit": float(profit)}
+                for date, profit in zip(self.dates, profit_by_date)
+            ]
+        }
+    
+    def _reset_buffers(self):
+        """Start a new chunk of buffered columns."""
+        self._order_totals: List = []
+        self._order_dates: List[str] = []
+        self._item_dates: List[str] = []
+        self._item_unit_costs: List[float] = []
+        self._item_titles: List[str] = []
+        self._item_prices: List = []
+        self._item_quantities: List = []
+    
+    def _flush(self):
+        """Reduce the buffered chunk into the running totals."""
+        if self._order_totals:
+            totals = np.asarray(self._order_totals, dtype=np.float64)
+            self.total_orders += int(totals.size)
+            self.total_sales += float(totals.sum())
+            
+            if self.dates:
+                positions, in_window = self._day_positions(self._order_dates)
+                self.sales_by_date += np.bincount(
+                    positions[in_window], weights=totals[in_window], minlength=len(self.dates)
+                )
+        
+        if self._item_titles:
+            titles, inverse = np.unique(np.asarray(self._item_titles), return_inverse=True)
+            quantities = np.asarray(self._item_quantities, dtype=np.int64)
+            prices = np.asarray(self._item_prices, dtype=np.float64)
+            revenue = prices * quantities
+            
+            unit_costs = np.asarray(self._item_unit_costs, dtype=np.float64)
+            unknown = np.isnan(unit_costs)
+            unit_costs[unknown] = prices[unknown] * ESTIMATED_COST_RATIO
+            costs = unit_costs * quantities
+            self.total_cost += float(costs.sum())
+            
+            if self.dates:
+                positions, in_window = self._day_positions(self._item_dates)
+                self.cost_by_date += np.bincount(
+                    positions[in_window], weights=costs[in_window], minlength=len(self.dates)
+                )
+            
+            revenue_sums = np.bincount(inverse, weights=revenue, minlength=titles.size)
+            quantity_sums = np.bincount(inverse, weights=quantities, minlength=titles.size)
+            
+            for title, product_revenue, quantity in zip(titles.tolist(), revenue_sums, quantity_sums):
+                self.product_revenue[title] = self.product_revenue.get(title, 0.0) + float(product_revenue)
+                self.product_quantity[title] = self.product_quantity.get(title, 0) + int(quantity)
+        
+        self._reset_buffers()
+    
+    def _day_positions(self, timestamps: List[str]):
+        """Window index of each timestamp's day, and whether it falls in the window."""
+        # ISO timestamps start with the store-local date; U10 keeps just that
+        days = np.asarray(timestamps, dtype="U10")
+        positions = np.searchsorted(self._date_index, days)
+        clipped = np.minimum(positions, len(self.dates) - 1)
+        return clipped, self._date_index[clipped] == days
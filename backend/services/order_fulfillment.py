@@ -2,11 +2,12 @@
 import logging
 from typing import List, Optional, Dict
 from datetime import datetime
-import httpx
 import shopify
 
 from backend.models.schemas import Order
 from backend.config.settings import get_settings
+from backend.services.http_client import get_http_client
+from backend.services.shopify_client import get_shopify_client
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -23,28 +24,18 @@ class OrderFulfillmentService:
         self.shopify_store_name = settings.shopify_store_name
         self.auto_fulfill_enabled = settings.auto_fulfill_enabled
         
-        # Initialize Shopify session
-        if self.shopify_store_name and self.shopify_access_token:
-            shopify.ShopifyResource.set_site(
-                f"https://{self.shopify_store_name}.myshopify.com/admin/api/2024-01"
-            )
-            self.session = shopify.Session(
-                f"{self.shopify_store_name}.myshopify.com",
-                "2024-01",
-                self.shopify_access_token
-            )
-        else:
-            self.session = None
+        # Shopify SDK calls run off the event loop via the shared client
+        self.shopify = get_shopify_client()
     
     async def get_pending_orders(self) -> List[Order]:
         """Get all pending orders that need fulfillment."""
-        if not self.session:
+        if not self.shopify.configured:
             logger.warning("Shopify not configured, returning mock orders")
             return self._get_mock_orders()
         
         try:
             # Get unfulfilled orders
-            orders = shopify.Order.find(
+            orders = await self.shopify.find_orders(
                 fulfillment_status="unfulfilled",
                 status="any",
                 limit=50
@@ -97,10 +88,10 @@ class OrderFulfillmentService:
         
         try:
             # Get order from Shopify
-            if not self.session:
+            if not self.shopify.configured:
                 return {"status": "error", "message": "Shopify not configured"}
             
-            shopify_order = shopify.Order.find(order_id)
+            shopify_order = await self.shopify.find_order(order_id)
             
             # Extract order details
             items = []
@@ -130,7 +121,7 @@ class OrderFulfillmentService:
                 fulfillment.tracking_company = "CJ Logistics"
                 fulfillment.tracking_urls = [fulfillment_result.get("tracking_url", "")]
                 
-                if fulfillment.save():
+                if await self.shopify.save(fulfillment):
                     logger.info(f"Order {order_id} fulfilled successfully")
                     return {
                         "status": "success",
@@ -164,55 +155,54 @@ class OrderFulfillmentService:
             }
         
         try:
-            async with httpx.AsyncClient() as client:
-                url = f"{self.cj_base_url}/api/orders/create"
-                headers = {
-                    "Authorization": f"Bearer {self.cj_api_key}",
-                    "Content-Type": "application/json"
-                }
-                
-                payload = {
-                    "order_id": order_id,
-                    "items": items,
-                    "shipping": {
-                        "name": shipping_address.get("name"),
-                        "address": shipping_address.get("address1"),
-                        "city": shipping_address.get("city"),
-                        "state": shipping_address.get("province"),
-                        "zip": shipping_address.get("zip"),
-                        "country": shipping_address.get("country")
-                    },
-                    "shipping_method": "standard"  # or "express" based on customer selection
-                }
-                
-                response = await client.post(url, headers=headers, json=payload, timeout=30.0)
-                response.raise_for_status()
-                data = response.json()
-                
-                return {
-                    "success": True,
-                    "tracking_number": data.get("tracking_number"),
-                    "tracking_url": data.get("tracking_url"),
-                    "estimated_delivery": data.get("estimated_delivery")
-                }
-                
+            url = f"{self.cj_base_url}/api/orders/create"
+            headers = {
+                "Authorization": f"Bearer {self.cj_api_key}",
+                "Content-Type": "application/json"
+            }
+            
+            payload = {
+                "order_id": order_id,
+                "items": items,
+                "shipping": {
+                    "name": shipping_address.get("name"),
+                    "address": shipping_address.get("address1"),
+                    "city": shipping_address.get("city"),
+                    "state": shipping_address.get("province"),
+                    "zip": shipping_address.get("zip"),
+                    "country": shipping_address.get("country")
+                },
+                "shipping_method": "standard"  # or "express" based on customer selection
+            }
+            
+            client = get_http_client(url)
+            response = await client.post(url, headers=headers, json=payload, timeout=30.0)
+            response.raise_for_status()
+            data = response.json()
+            
+            return {
+                "success": True,
+                "tracking_number": data.get("tracking_number"),
+                "tracking_url": data.get("tracking_url"),
+                "estimated_delivery": data.get("estimated_delivery")
+            }
+            
         except Exception as e:
             logger.error(f"Error creating CJ fulfillment: {e}")
             return {"success": False, "error": str(e)}
     
     async def update_tracking(self, order_id: str, tracking_number: str) -> bool:
         """Update tracking information for an order."""
-        if not self.session:
+        if not self.shopify.configured:
             return False
         
         try:
-            order = shopify.Order.find(order_id)
-            fulfillments = shopify.Fulfillment.find(order_id=order_id)
+            fulfillments = await self.shopify.find_fulfillments(order_id)
             
             if fulfillments:
                 fulfillment = fulfillments[0]
                 fulfillment.tracking_number = tracking_number
-                return fulfillment.save()
+                return await self.shopify.save(fulfillment)
             
             return False
             
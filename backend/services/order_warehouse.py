@@ -0,0 +1,187 @@
+"""Local order warehouse kept in sync with Shopify for analytics."""
+import asyncio
+import logging
+from typing import Dict, List, Optional
+from datetime import datetime, timezone
+from sqlalchemy import select, delete, insert
+
+from backend.models.database import (
+    OrderRecord, OrderLineItemRecord, SyncState, get_sessionmaker, upsert
+)
+from backend.services.shopify_client import get_shopify_client, SHOPIFY_MAX_PAGE_SIZE
+from backend.services.metrics_rollup import MetricsRollup
+from backend.services.cost_index import get_cost_index
+
+logger = logging.getLogger(__name__)
+
+SYNC_NAME = "shopify_orders"
+
+
+def to_utc(value: datetime) -> datetime:
+    """Normalize a datetime to naive UTC, the form stored in the warehouse."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse a Shopify ISO 8601 timestamp to naive UTC."""
+    return to_utc(datetime.fromisoformat(value.replace("Z", "+00:00")))
+
+
+class OrderWarehouse:
+    """
+    Local copy of Shopify orders and line items.
+
+    sync() pulls only orders updated since the last stored cursor
+    (updated_at_min), so dashboard queries run against the local database
+    instead of paying Shopify round trips on every request. Each stored
+    batch also refreshes the daily rollups for the days it touched.
+    Line items keep the landed unit cost their SKU had when the order was
+    first synced, so later supplier price changes do not re-cost history.
+    """
+    
+    def __init__(self):
+        self.shopify = get_shopify_client()
+        self.rollups = MetricsRollup()
+        self.cost_index = get_cost_index()
+        self._lock = asyncio.Lock()
+    
+    async def has_synced(self) -> bool:
+        """Whether at least one sync has completed."""
+        state = await self._get_state()
+        return state is not None and state.synced_at is not None
+    
+    async def sync(self) -> int:
+        """
+        Pull orders created or updated since the last sync.
+
+        Returns:
+            Number of orders written to the warehouse
+        """
+        async with self._lock:
+            await self.rollups.ensure_backfilled()
+            state = await self._get_state()
+            cursor = state.cursor if state else None
+            
+            params = {"status": "any", "order": "updated_at asc"}
+            if cursor:
+                params["updated_at_min"] = cursor
+            
+            synced = 0
+            batch = []
+            async for order in self.shopify.iter_orders(**params):
+                batch.append(order)
+                if len(batch) >= SHOPIFY_MAX_PAGE_SIZE:
+                    cursor = await self._store(batch, cursor)
+                    synced += len(batch)
+                    batch = []
+            
+            if batch:
+                cursor = await self._store(batch, cursor)
+                synced += len(batch)
+            
+            await self._save_state(cursor, datetime.utcnow())
+            logger.info(f"Order warehouse synced {synced} orders")
+            return synced
+    
+    async def _store(self, orders: List[Dict], cursor: Optional[str]) -> Optional[str]:
+        """Upsert a batch of orders and their line items; returns the advanced cursor."""
+        unit_costs = await self.cost_index.load()
+        order_rows = []
+        item_rows = []
+        newest = parse_timestamp(cursor) if cursor else None
+        
+        # An order updated mid-sync can show up on two pages; keep its latest
+        # version, since a multi-row upsert may not touch the same row twice
+        latest = {}
+        for order in orders:
+            updated_at = parse_timestamp(order.get("updated_at") or order["created_at"])
+            order_id = str(order["id"])
+            if order_id not in latest or updated_at >= latest[order_id][0]:
+                latest[order_id] = (updated_at, order)
+        
+        for updated_at, order in latest.values():
+            created_at = parse_timestamp(order["created_at"])
+            created_date = order["created_at"][:10]
+            
+            order_rows.append({
+                "id": str(order["id"]),
+                "order_number": str(order.get("order_number", "")),
+                "total_price": float(order.get("total_price") or 0),
+                "currency": order.get("currency"),
+                "financial_status": order.get("financial_status"),
+                "fulfillment_status": order.get("fulfillment_status"),
+                "created_at": created_at,
+                "updated_at": updated_at,
+                "created_date": created_date
+            })
+            
+            for item in order.get("line_items", []):
+                item_rows.append({
+                    "id": str(item["id"]),
+                    "order_id": str(order["id"]),
+                    "sku": item.get("sku"),
+                    "title": item.get("title") or "",
+                    "quantity": int(item.get("quantity") or 0),
+                    "price": float(item.get("price") or 0),
+                    "unit_cost": unit_costs.get(item.get("sku")) if item.get("sku") else None,
+                    "created_at": created_at,
+                    "created_date": created_date
+                })
+            
+            if newest is None or updated_at > newest:
+                newest = updated_at
+                cursor = order.get("updated_at") or order["created_at"]
+        
+        async with get_sessionmaker()() as session:
+            async with session.begin():
+                # Items already warehoused keep the cost they were bought at
+                known_costs = dict((await session.execute(
+                    select(OrderLineItemRecord.id, OrderLineItemRecord.unit_cost)
+                    .where(
+                        OrderLineItemRecord.order_id.in_([row["id"] for row in order_rows]),
+                        OrderLineItemRecord.unit_cost.is_not(None)
+                    )
+                )).all())
+                for row in item_rows:
+                    row["unit_cost"] = known_costs.get(row["id"], row["unit_cost"])
+                
+                await session.execute(upsert(OrderRecord, order_rows, ["id"]))
+                # Line items are replaced wholesale so edited orders drop removed items
+                await session.execute(
+                    delete(OrderLineItemRecord)
+                    .where(OrderLineItemRecord.order_id.in_([row["id"] for row in order_rows]))
+                )
+                if item_rows:
+                    await session.execute(insert(OrderLineItemRecord), item_rows)
+                await self.rollups.rebuild_days(session, {row["created_date"] for row in order_rows})
+                await session.execute(upsert(SyncState, [{"name": SYNC_NAME, "cursor": cursor}], ["name"]))
+        
+        return cursor
+    
+    async def _get_state(self) -> Optional[SyncState]:
+        """Load the sync cursor row."""
+        async with get_sessionmaker()() as session:
+            return await session.get(SyncState, SYNC_NAME)
+    
+    async def _save_state(self, cursor: Optional[str], synced_at: datetime):
+        """Persist the sync cursor and completion time."""
+        async with get_sessionmaker()() as session:
+            async with session.begin():
+                await session.execute(upsert(
+                    SyncState,
+                    [{"name": SYNC_NAME, "cursor": cursor, "synced_at": synced_at}],
+                    ["name"]
+                ))
+
+
+_warehouse: Optional[OrderWarehouse] = None
+
+
+def get_order_warehouse() -> OrderWarehouse:
+    """Get order warehouse singleton."""
+    global _warehouse
+    if _warehouse is None:
+        _warehouse = OrderWarehouse()
+    return _warehouse
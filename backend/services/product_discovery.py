@@ -1,12 +1,14 @@
 """Product discovery service for finding trending and high-margin products."""
 import asyncio
-from typing import List, Optional, Dict
+import heapq
+from typing import Awaitable, Callable, List, Optional
 from datetime import datetime, timedelta
-import httpx
 import logging
 
 from backend.models.schemas import Product, ProductStatus
 from backend.config.settings import get_settings
+from backend.services.image_dedup import ImageDeduplicator
+from backend.services.suppliers import get_suppliers, composite_score, shipping_days
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -16,25 +18,29 @@ class ProductDiscoveryService:
     """Service for discovering trending and high-margin products."""
     
     def __init__(self):
-        self.cj_api_key = settings.cj_api_key
-        self.cj_api_secret = settings.cj_api_secret
-        self.cj_base_url = settings.cj_base_url
         self.min_margin = settings.min_profit_margin
-        self.min_daily_sales = settings.min_daily_sales
-        
+        self.suppliers = get_suppliers()
+        self.image_dedup = ImageDeduplicator()
+    
     async def discover_products(
         self,
         category: Optional[str] = None,
         min_margin: Optional[float] = None,
-        limit: int = 20
+        limit: int = 20,
+        exclude: Optional[Callable[[str], Awaitable[bool]]] = None
     ) -> List[Product]:
         """
         Discover trending and high-margin products.
         
+        Every configured supplier is queried concurrently, each under its
+        own timeout and circuit breaker, and their score-ordered results
+        are k-way merged.
+        
         Args:
             category: Product category filter
             min_margin: Minimum profit margin (0.0-1.0)
             limit: Maximum number of products to return
+            exclude: Async predicate on supplier product id; matching products are skipped
             
         Returns:
             List of discovered products
@@ -44,108 +50,47 @@ class ProductDiscoveryService:
         # Use minimum margin from settings if not provided
         margin_threshold = min_margin or self.min_margin
         
-        # Discover from CJdropshipping API
-        products = await self._discover_cj_products(category, margin_threshold, limit)
+        suppliers = [supplier for supplier in self.suppliers if supplier.configured]
+        if not suppliers:
+            logger.warning("No supplier configured, using mock data")
+            return await self._get_fallback_products(margin_threshold, limit, exclude)
         
-        # Also try AliExpress via CJ (they often have AliExpress products)
-        if len(products) < limit:
-            ali_products = await self._discover_aliexpress_products(category, margin_threshold, limit - len(products))
-            products.extend(ali_products)
+        results = await asyncio.gather(*(
+            supplier.discover(category, margin_threshold, limit, exclude)
+            for supplier in suppliers
+        ))
+        if all(result is None for result in results):
+            # Return mock data when every supplier is unreachable
+            return await self._get_fallback_products(margin_threshold, limit, exclude)
         
-        # Sort by profitability and trending score
-        products = sorted(products, key=lambda p: (p.margin, p.profit), reverse=True)
+        # Each source is already best-first, so a k-way merge keeps the ranking
+        products = list(heapq.merge(
+            *(result for result in results if result),
+            key=lambda p: p.score or 0.0,
+            reverse=True
+        ))
         
-        logger.info(f"Discovered {len(products)} products")
-        return products[:limit]
-    
-    async def _discover_cj_products(
-        self,
-        category: Optional[str],
-        min_margin: float,
-        limit: int
-    ) -> List[Product]:
-        """Discover products from CJdropshipping API."""
-        if not self.cj_api_key:
-            logger.warning("CJ API key not configured, using mock data")
-            return self._get_mock_products(min_margin, limit)
+        # Collapse the same item listed by several suppliers to its cheapest offer
+        if settings.image_dedup_enabled:
+            try:
+                products = await self.image_dedup.dedupe(products)
+            except Exception as e:
+                logger.error(f"Error deduplicating product images: {e}")
         
-        try:
-            async with httpx.AsyncClient() as client:
-                # Search for trending products
-                url = f"{self.cj_base_url}/api/products/search"
-                headers = {
-                    "Authorization": f"Bearer {self.cj_api_key}",
-                    "Content-Type": "application/json"
-                }
-                params = {
-                    "limit": limit * 2,  # Get more to filter
-                    "sort": "sales",  # Sort by sales volume
-                    "order": "desc"
-                }
-                
-                if category:
-                    params["category"] = category
-                
-                response = await client.get(url, headers=headers, params=params, timeout=30.0)
-                response.raise_for_status()
-                data = response.json()
-                
-                products = []
-                for item in data.get("data", {}).get("list", []):
-                    # Calculate profit margin
-                    supplier_price = float(item.get("price", 0))
-                    shipping_cost = float(item.get("shippingCost", 0))
-                    total_cost = supplier_price + shipping_cost
-                    
-                    # Suggested retail price (2-3x markup)
-                    suggested_price = total_cost * 2.5
-                    
-                    profit = suggested_price - total_cost
-                    margin = profit / suggested_price if suggested_price > 0 else 0
-                    
-                    # Filter by minimum margin and sales volume
-                    if margin >= min_margin and item.get("salesVolume", 0) >= self.min_daily_sales:
-                        product = Product(
-                            id=item.get("productId"),
-                            title=item.get("productName", ""),
-                            description=item.get("description", ""),
-                            price=suggested_price,
-                            cost=total_cost,
-                            margin=margin,
-                            profit=profit,
-                            category=item.get("category", ""),
-                            images=item.get("images", []),
-                            supplier_id=item.get("supplierId", ""),
-                            supplier_name=item.get("supplierName", "CJ Supplier"),
-                            supplier_url=item.get("productUrl", ""),
-                            shipping_info={
-                                "cost": shipping_cost,
-                                "time": item.get("shippingTime", "7-15 days")
-                            },
-                            status=ProductStatus.DISCOVERED,
-                            created_at=datetime.utcnow()
-                        )
-                        products.append(product)
-                
-                return products
-                
-        except Exception as e:
-            logger.error(f"Error discovering CJ products: {e}")
-            # Return mock data on error
-            return self._get_mock_products(min_margin, limit)
+        logger.info(f"Discovered {len(products[:limit])} products")
+        return products[:limit]
     
-    async def _discover_aliexpress_products(
+    async def _get_fallback_products(
         self,
-        category: Optional[str],
         min_margin: float,
-        limit: int
+        limit: int,
+        exclude: Optional[Callable[[str], Awaitable[bool]]] = None
     ) -> List[Product]:
-        """Discover products from AliExpress (via CJ or direct scraping)."""
-        # CJdropshipping often includes AliExpress products
-        # In a real implementation, you'd use AliExpress Dropshipping API
-        # or web scraping with proper authorization
-        logger.info("AliExpress product discovery (using CJ proxy)")
-        return []
+        """Mock products, ranked and filtered like live results."""
+        products = self._get_mock_products(min_margin, limit)
+        if exclude is not None:
+            products = [product for product in products if not await exclude(product.id)]
+        return heapq.nlargest(limit, products, key=lambda p: p.score or 0.0)
     
     def _get_mock_products(self, min_margin: float, limit: int) -> List[Product]:
         """Generate mock products for testing when APIs are not configured."""
@@ -223,6 +168,9 @@ class ProductDiscoveryService:
                     cost=item["cost"],
                     margin=item["margin"],
                     profit=item["price"] - item["cost"],
+                    score=composite_score(
+                        item["margin"], item["price"] - item["cost"], item["sales_volume"], shipping_days("7-15 days")
+                    ),
                     category=item["category"],
                     images=item["images"],
                     supplier_id=item["supplier"].replace(" ", "-").lower(),
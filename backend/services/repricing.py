@@ -0,0 +1,256 @@
+"""Batch repricing of the listed catalog."""
+import logging
+from typing import Dict, Iterable, List, Optional, Set
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import select, func
+
+from backend.models.database import ProductCostRecord, OrderLineItemRecord, get_sessionmaker
+from backend.config.settings import get_settings
+from backend.services.shopify_client import get_shopify_client
+from backend.services.shopify_manager import ShopifyManager
+from backend.services.catalog import get_product_catalog
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Markup multiplier per doubling of sales velocity relative to the catalog median
+VELOCITY_SENSITIVITY = 0.05
+MIN_DEMAND_FACTOR = 0.9
+MAX_DEMAND_FACTOR = 1.15
+
+# SKUs per IN (...) lookup
+SKU_BATCH_SIZE = 500
+
+
+def charm_up(prices: np.ndarray) -> np.ndarray:
+    """Round prices up to the next .99."""
+    return np.ceil(prices + 0.01) - 0.01
+
+
+def compute_prices(
+    cost: np.ndarray,
+    shipping: np.ndarray,
+    velocity: np.ndarray,
+    markup: float,
+    min_margin: float,
+    median: Optional[float] = None
+) -> np.ndarray:
+    """
+    Retail prices for a whole catalog in one vectorized pass.
+
+    Args:
+        cost: Supplier unit cost
+        shipping: Shipping cost per unit
+        velocity: Units sold per day
+        markup: Base retail multiple of landed cost
+        min_margin: Minimum profit margin every price must keep, in [0, 1)
+        median: Catalog median velocity, when pricing only part of the catalog
+
+    Returns:
+        New prices ending in .99
+    """
+    if not 0.0 <= min_margin < 1.0:
+        raise ValueError(f"min_margin must be in [0, 1), got {min_margin}")
+    
+    landed = cost + shipping
+    
+    # Fast sellers carry more markup and slow sellers less, relative to the median
+    if median is None:
+        median = np.median(velocity) if velocity.size else 0.0
+    demand = np.clip(
+        1 + VELOCITY_SENSITIVITY * np.log2((velocity + 1) / (median + 1)),
+        MIN_DEMAND_FACTOR,
+        MAX_DEMAND_FACTOR
+    )
+    prices = charm_up(landed * markup * demand)
+    
+    # Never below the minimum margin
+    return np.maximum(prices, charm_up(landed / (1 - min_margin)))
+
+
+class RepricingEngine:
+    """
+    Reprices every listed variant with a known landed cost.
+
+    Costs come from product_costs, sales velocity from the order
+    warehouse and current prices from Shopify. New prices are computed
+    with compute_prices over the whole catalog at once, and only variants
+    whose price actually changed are pushed back. Prices Shopify accepted
+    are also written to the local catalog with their new profit and margin.
+    """
+    
+    def __init__(self):
+        self.shopify = get_shopify_client()
+        self.shopify_manager = ShopifyManager()
+        self.catalog = get_product_catalog()
+    
+    async def run(self) -> Dict[str, float]:
+        """
+        Reprice the whole catalog.
+
+        Returns:
+            New price per updated variant ID
+        """
+        if not self.shopify.configured:
+            return {}
+        
+        variants = []
+        async for product in self.shopify.iter_products(fields="id,variants"):
+            for variant in product.get("variants", []):
+                if variant.get("sku"):
+                    variants.append(variant)
+        
+        return await self.reprice(variants)
+    
+    async def reprice_products(self, product_ids: List[str]) -> Set[str]:
+        """
+        Reprice just the given Shopify products against the whole catalog's velocity.
+
+        Returns:
+            IDs of the products whose variants all carry their new price;
+            products whose variants could not be read or updated are left out
+        """
+        variants = await self.shopify_manager.get_product_variants(product_ids)
+        if not variants:
+            return set()
+        
+        updates = await self._price_updates(variants, median_velocity=await self._median_velocity())
+        updated = await self._push(updates, variants)
+        failed = updates.keys() - updated.keys()
+        return (
+            {str(variant["product_id"]) for variant in variants}
+            - {str(variant["product_id"]) for variant in variants if str(variant["id"]) in failed}
+        )
+    
+    async def reprice(
+        self,
+        variants: List[Dict],
+        median_velocity: Optional[float] = None
+    ) -> Dict[str, float]:
+        """
+        Reprice the given Shopify variants and push the changed prices.
+
+        Args:
+            variants: Shopify variant dicts (id, sku, price)
+            median_velocity: Catalog median units per day; defaults to the median of these variants
+
+        Returns:
+            New price per updated variant ID
+        """
+        updates = await self._price_updates(variants, median_velocity)
+        return await self._push(updates, variants)
+    
+    async def _price_updates(
+        self,
+        variants: List[Dict],
+        median_velocity: Optional[float] = None
+    ) -> Dict[str, float]:
+        """New price per variant ID, for the variants whose price changes."""
+        skus = {variant["sku"] for variant in variants if variant.get("sku")}
+        costs = await self._load_costs(skus)
+        velocity = await self._load_velocity(skus)
+        
+        # Variants without a recorded cost cannot be priced
+        variants = [variant for variant in variants if variant.get("sku") in costs]
+        if not variants:
+            return {}
+        
+        sku_list = [variant["sku"] for variant in variants]
+        cost = np.fromiter((costs[sku][0] for sku in sku_list), dtype=np.float64, count=len(sku_list))
+        shipping = np.fromiter((costs[sku][1] for sku in sku_list), dtype=np.float64, count=len(sku_list))
+        sold = np.fromiter((velocity.get(sku, 0) for sku in sku_list), dtype=np.float64, count=len(sku_list))
+        current = np.fromiter(
+            (float(variant.get("price") or 0) for variant in variants), dtype=np.float64, count=len(sku_list)
+        )
+        
+        prices = compute_prices(
+            cost,
+            shipping,
+            sold / settings.repricing_velocity_days,
+            markup=settings.price_markup,
+            min_margin=settings.min_profit_margin,
+            median=median_velocity
+        )
+        
+        changed = np.flatnonzero(np.abs(prices - current) >= 0.005)
+        return {str(variants[i]["id"]): round(float(prices[i]), 2) for i in changed}
+    
+    async def _push(self, updates: Dict[str, float], variants: List[Dict]) -> Dict[str, float]:
+        """Push new variant prices; returns the ones Shopify accepted."""
+        if not updates:
+            return {}
+        
+        results = await self.shopify_manager.update_variant_prices(updates)
+        updated = {variant_id: updates[variant_id] for variant_id, ok in results.items() if ok}
+        logger.info(f"Repriced {len(updated)} of {len(variants)} variants")
+        
+        if updated:
+            try:
+                await self._record_catalog_prices(variants, updated)
+            except Exception as e:
+                logger.error(f"Error recording repriced prices in the catalog: {e}")
+        return updated
+    
+    async def _record_catalog_prices(self, variants: List[Dict], updated: Dict[str, float]):
+        """Write pushed prices to the catalog rows of their SKUs (the supplier product id)."""
+        skus = {str(variant["id"]): variant["sku"] for variant in variants if str(variant["id"]) in updated}
+        costs = await self._load_costs(skus.values())
+        await self.catalog.update_prices({
+            sku: (updated[variant_id], sum(costs[sku]))
+            for variant_id, sku in skus.items()
+            if sku in costs
+        })
+    
+    async def _median_velocity(self) -> float:
+        """Median units per day across every SKU with a recorded cost."""
+        since = datetime.utcnow() - timedelta(days=settings.repricing_velocity_days)
+        sold = (
+            select(OrderLineItemRecord.sku, func.sum(OrderLineItemRecord.quantity).label("quantity"))
+            .where(OrderLineItemRecord.created_at >= since)
+            .group_by(OrderLineItemRecord.sku)
+            .subquery()
+        )
+        async with get_sessionmaker()() as session:
+            quantities = (await session.execute(
+                select(func.coalesce(sold.c.quantity, 0))
+                .select_from(ProductCostRecord)
+                .outerjoin(sold, sold.c.sku == ProductCostRecord.sku)
+            )).scalars().all()
+        
+        if not quantities:
+            return 0.0
+        return float(np.median(np.asarray(quantities, dtype=np.float64))) / settings.repricing_velocity_days
+    
+    async def _load_costs(self, skus: Iterable[str]) -> Dict[str, tuple]:
+        """(supplier cost, shipping cost) per SKU."""
+        skus = list(skus)
+        costs = {}
+        async with get_sessionmaker()() as session:
+            for start in range(0, len(skus), SKU_BATCH_SIZE):
+                rows = (await session.execute(
+                    select(ProductCostRecord.sku, ProductCostRecord.cost, ProductCostRecord.shipping_cost)
+                    .where(ProductCostRecord.sku.in_(skus[start:start + SKU_BATCH_SIZE]))
+                )).all()
+                for sku, cost, shipping_cost in rows:
+                    shipping_cost = shipping_cost or 0.0
+                    costs[sku] = (cost - shipping_cost, shipping_cost)
+        return costs
+    
+    async def _load_velocity(self, skus: Iterable[str]) -> Dict[str, int]:
+        """Units sold per SKU over the velocity window."""
+        skus = list(skus)
+        since = datetime.utcnow() - timedelta(days=settings.repricing_velocity_days)
+        sold = {}
+        async with get_sessionmaker()() as session:
+            for start in range(0, len(skus), SKU_BATCH_SIZE):
+                rows = (await session.execute(
+                    select(OrderLineItemRecord.sku, func.sum(OrderLineItemRecord.quantity))
+                    .where(
+                        OrderLineItemRecord.sku.in_(skus[start:start + SKU_BATCH_SIZE]),
+                        OrderLineItemRecord.created_at >= since
+                    )
+                    .group_by(OrderLineItemRecord.sku)
+                )).all()
+                sold.update({sku: int(quantity or 0) for sku, quantity in rows})
+        return sold
@@ -0,0 +1,150 @@
+"""Index of supplier products that have already been listed."""
+import asyncio
+import hashlib
+import logging
+import math
+from typing import Dict, Iterable, Optional
+from datetime import datetime
+from sqlalchemy import select, func
+
+from backend.models.database import SeenProductRecord, get_sessionmaker, upsert
+from backend.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Product ids per IN (...) lookup
+LOOKUP_BATCH_SIZE = 500
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys."""
+    
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+    
+    def add(self, key: str):
+        """Add a key to the filter."""
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+    
+    def _positions(self, key: str):
+        """Bit positions for a key, by double hashing one 128-bit digest."""
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+
+class SeenProductIndex:
+    """
+    Supplier product ids already listed, persisted in seen_products.
+
+    A Bloom filter loaded from the table answers most lookups in memory:
+    a negative is definitive, and only positives are confirmed against the
+    database, so unseen candidates never cost a query.
+    """
+    
+    def __init__(self):
+        self._bloom: Optional[BloomFilter] = None
+        self._lock = asyncio.Lock()
+    
+    async def load(self):
+        """Build the Bloom filter from the table once."""
+        if self._bloom is not None:
+            return
+        
+        async with self._lock:
+            if self._bloom is None:
+                await self._rebuild()
+    
+    async def contains(self, product_id: Optional[str]) -> bool:
+        """Whether a supplier product has already been listed."""
+        if not product_id:
+            return False
+        
+        await self.load()
+        if product_id not in self._bloom:
+            return False
+        
+        async with get_sessionmaker()() as session:
+            return await session.get(SeenProductRecord, product_id) is not None
+    
+    async def mark_seen(
+        self,
+        product_id: str,
+        supplier_id: Optional[str] = None,
+        shopify_product_id: Optional[str] = None
+    ):
+        """Record a supplier product as listed."""
+        await self.load()
+        async with get_sessionmaker()() as session:
+            async with session.begin():
+                await session.execute(upsert(
+                    SeenProductRecord,
+                    [{
+                        "product_id": product_id,
+                        "supplier_id": supplier_id,
+                        "shopify_product_id": shopify_product_id,
+                        "seen_at": datetime.utcnow()
+                    }],
+                    ["product_id"]
+                ))
+        
+        async with self._lock:
+            self._bloom.add(product_id)
+            # Keep the false-positive rate near target as the catalog grows
+            if self._bloom.count > self._bloom.capacity:
+                await self._rebuild()
+    
+    async def listings(self, product_ids: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Shopify product ID per listed supplier product, for those that are listed."""
+        await self.load()
+        product_ids = [product_id for product_id in product_ids if product_id and product_id in self._bloom]
+        if not product_ids:
+            return {}
+        
+        listed = {}
+        async with get_sessionmaker()() as session:
+            for start in range(0, len(product_ids), LOOKUP_BATCH_SIZE):
+                rows = (await session.execute(
+                    select(SeenProductRecord.product_id, SeenProductRecord.shopify_product_id)
+                    .where(SeenProductRecord.product_id.in_(product_ids[start:start + LOOKUP_BATCH_SIZE]))
+                )).all()
+                listed.update(dict(rows))
+        return listed
+    
+    async def _rebuild(self):
+        """Size a new filter for the current table and fill it."""
+        async with get_sessionmaker()() as session:
+            total = (await session.execute(select(func.count(SeenProductRecord.product_id)))).scalar_one()
+            bloom = BloomFilter(
+                max(settings.seen_products_capacity, total * 2),
+                settings.seen_products_error_rate
+            )
+            result = await session.stream_scalars(select(SeenProductRecord.product_id))
+            async for product_id in result:
+                bloom.add(product_id)
+        
+        self._bloom = bloom
+        logger.info(f"Loaded {bloom.count} seen products into Bloom filter")
+
+
+_seen_products: Optional[SeenProductIndex] = None
+
+
+def get_seen_product_index() -> SeenProductIndex:
+    """Get seen-product index singleton."""
+    global _seen_products
+    if _seen_products is None:
+        _seen_products = SeenProductIndex()
+    return _seen_products
@@ -0,0 +1,212 @@
+"""Async data-access layer over the ShopifyAPI SDK."""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+import shopify
+
+from backend.config.settings import get_settings
+from backend.services.http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+SHOPIFY_API_VERSION = "2024-01"
+
+# Largest page the REST Admin API returns
+SHOPIFY_MAX_PAGE_SIZE = 250
+
+
+class RateLimiter:
+    """Spaces calls so no more than `rate` start per second."""
+    
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait for the next free slot."""
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class AsyncShopifyClient:
+    """
+    Runs blocking ShopifyAPI SDK calls on a bounded thread pool.
+
+    The SDK keeps its site and auth headers per thread, so every worker
+    thread activates the session once when it starts. The session and
+    pool are created on the first SDK call, so REST-only users never
+    touch the SDK. A slow Shopify request then only occupies a worker
+    thread, never the event loop.
+    Bulk reads that need cursor pagination go through the REST API
+    directly on the shared HTTP client instead.
+    """
+    
+    def __init__(self):
+        self.store_name = settings.shopify_store_name
+        self.access_token = settings.shopify_access_token
+        self._session: Optional[shopify.Session] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        
+        if self.store_name and self.access_token:
+            self.api_base_url = f"https://{self.store_name}.myshopify.com/admin/api/{SHOPIFY_API_VERSION}"
+            self.headers = {
+                "X-Shopify-Access-Token": self.access_token,
+                "Content-Type": "application/json"
+            }
+        else:
+            self.api_base_url = None
+            self.headers = None
+    
+    @property
+    def configured(self) -> bool:
+        """Whether Shopify credentials are available."""
+        return self.api_base_url is not None
+    
+    @property
+    def session(self) -> Optional[shopify.Session]:
+        """SDK session, created on first use."""
+        if self._session is None and self.configured:
+            # The pinned SDK's built-in version list stops before the version the REST calls use
+            shopify.ApiVersion.define_version(shopify.Release(SHOPIFY_API_VERSION))
+            self._session = shopify.Session(
+                f"{self.store_name}.myshopify.com",
+                SHOPIFY_API_VERSION,
+                self.access_token
+            )
+        return self._session
+    
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking SDK call on the Shopify worker pool."""
+        if not self.configured:
+            raise RuntimeError("Shopify not configured")
+        
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.shopify_max_workers,
+                thread_name_prefix="shopify",
+                initializer=shopify.ShopifyResource.activate_session,
+                initargs=(self.session,)
+            )
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+    
+    async def find_orders(self, **params) -> List[shopify.Order]:
+        """Find orders matching the given query parameters."""
+        return await self.run(shopify.Order.find, **params)
+    
+    async def find_order(self, order_id: str) -> shopify.Order:
+        """Find a single order by ID."""
+        return await self.run(shopify.Order.find, order_id)
+    
+    async def find_fulfillments(self, order_id: str) -> List[shopify.Fulfillment]:
+        """Find fulfillments for an order."""
+        return await self.run(shopify.Fulfillment.find, order_id=order_id)
+    
+    async def save(self, resource: shopify.ShopifyResource) -> bool:
+        """Save a resource (create or update)."""
+        return await self.run(resource.save)
+    
+    async def iter_resources(
+        self,
+        resource: str,
+        page_size: int = SHOPIFY_MAX_PAGE_SIZE,
+        prefetch: int = 1,
+        **params
+    ) -> AsyncIterator[Dict]:
+        """
+        Stream every record of a REST resource (e.g. "orders").
+
+        Follows the cursor in the Link header until the last page. The
+        next page is fetched while the current one is being consumed, with
+        at most `prefetch` pages buffered, so memory stays bounded by the
+        page size regardless of how many records match.
+        """
+        if not self.configured:
+            raise RuntimeError("Shopify not configured")
+        
+        url = f"{self.api_base_url}/{resource}.json"
+        client = get_http_client(url)
+        pages: asyncio.Queue = asyncio.Queue(maxsize=max(prefetch, 1))
+        
+        async def fetch_pages():
+            next_url = url
+            query = {**params, "limit": min(page_size, SHOPIFY_MAX_PAGE_SIZE)}
+            try:
+                while next_url:
+                    response = await client.get(next_url, headers=self.headers, params=query)
+                    response.raise_for_status()
+                    await pages.put(response.json().get(resource, []))
+                    
+                    # The next link already carries page_info and limit
+                    next_url = response.links.get("next", {}).get("url")
+                    query = None
+                await pages.put(None)
+            except Exception as e:
+                await pages.put(e)
+        
+        fetcher = asyncio.create_task(fetch_pages())
+        try:
+            while True:
+                page = await pages.get()
+                if page is None:
+                    break
+                if isinstance(page, Exception):
+                    raise page
+                for record in page:
+                    yield record
+        finally:
+            fetcher.cancel()
+    
+    def iter_orders(self, **params) -> AsyncIterator[Dict]:
+        """Stream every order matching the given query parameters."""
+        return self.iter_resources("orders", **params)
+    
+    def iter_products(self, **params) -> AsyncIterator[Dict]:
+        """Stream every product matching the given query parameters."""
+        return self.iter_resources("products", **params)
+    
+    def shutdown(self):
+        """Stop the worker pool."""
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_client: Optional[AsyncShopifyClient] = None
+
+
+def get_shopify_client() -> AsyncShopifyClient:
+    """Get Shopify client singleton."""
+    global _client
+    if _client is None:
+        _client = AsyncShopifyClient()
+    return _client
+
+
+def close_shopify_client():
+    """Shut down the Shopify worker pool and reset the singleton."""
+    global _client
+    if _client is not None:
+        _client.shutdown()
+        _client = None
+
+
+_product_create_limiter: Optional[RateLimiter] = None
+
+
+def get_product_create_limiter() -> RateLimiter:
+    """Get the limiter shared by every Shopify product create."""
+    global _product_create_limiter
+    if _product_create_limiter is None:
+        _product_create_limiter = RateLimiter(settings.shopify_product_create_rate)
+    return _product_create_limiter
@@ -1,12 +1,17 @@
 """Shopify store management service."""
+import asyncio
 import logging
 from typing import List, Optional, Dict
-import httpx
 import json
 
 from backend.models.schemas import Product, StoreConfig
 from backend.config.settings import get_settings
+from backend.services.http_client import get_http_client
 from backend.services.ai_content_generator import AIContentGenerator
+from backend.services.cost_index import get_cost_index
+from backend.services.catalog import get_product_catalog
+from backend.services.shopify_client import get_shopify_client, get_product_create_limiter
+from backend.services.seen_products import get_seen_product_index
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -21,6 +26,10 @@ class ShopifyManager:
         self.store_name = settings.shopify_store_name
         self.access_token = settings.shopify_access_token
         self.content_generator = AIContentGenerator()
+        self.cost_index = get_cost_index()
+        self.catalog = get_product_catalog()
+        self.seen_products = get_seen_product_index()
+        self.shopify = get_shopify_client()
         
         # Shopify API base URL
         if self.store_name and self.access_token:
@@ -78,25 +87,35 @@ class ShopifyManager:
         Add a product to Shopify store with AI-generated descriptions and branding.
         """
         logger.info(f"Adding product to store: {product.title}")
+        content = await self.generate_listing_content(product)
+        return await self.create_listing(product, content)
+    
+    async def generate_listing_content(self, product: Product) -> Dict:
+        """AI-generated description, SEO title and tags for a product."""
+        if settings.ai_structured_listing_copy:
+            # One structured call for all three fields
+            return await self.content_generator.generate_listing_copy(
+                product_title=product.title,
+                base_description=product.description,
+                category=product.category
+            )
         
-        # Generate enhanced product description using AI
-        enhanced_description = await self.content_generator.generate_product_description(
+        # Independent fields, generated concurrently
+        return await self.content_generator.generate_listing_fields(
             product_title=product.title,
             base_description=product.description,
             category=product.category
         )
-        
-        # Generate SEO-optimized title
-        seo_title = await self.content_generator.generate_seo_title(product.title)
-        
-        # Generate product tags
-        tags = await self.content_generator.generate_product_tags(
-            product.title,
-            product.category
-        )
+    
+    async def create_listing(self, product: Product, content: Dict) -> Dict:
+        """Create the Shopify product from a product and its generated content."""
+        enhanced_description = content["description"]
+        seo_title = content["seo_title"]
+        tags = content["tags"]
         
         if not self.session_configured:
             # Mock mode
+            await self._record_listing(product, f"shopify-{product.id}")
             return {
                 "id": f"shopify-{product.id}",
                 "title": seo_title,
@@ -126,44 +145,70 @@ class ShopifyManager:
                 }
             }
             
-            # Create product via Shopify REST API
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                url = f"{self.api_base_url}/products.json"
-                response = await client.post(url, headers=self.headers, json=product_data)
-                response.raise_for_status()
-                
-                result = response.json()
-                shopify_product = result["product"]
-                
-                logger.info(f"Product added successfully: {shopify_product['id']}")
-                return {
-                    "id": str(shopify_product["id"]),
-                    "title": shopify_product["title"],
-                    "description": shopify_product.get("body_html", ""),
-                    "price": float(shopify_product["variants"][0]["price"]) if shopify_product.get("variants") else product.price,
-                    "status": shopify_product.get("status", "active"),
-                    "tags": shopify_product.get("tags", "").split(",") if shopify_product.get("tags") else tags,
-                    "url": f"https://{self.store_name}.myshopify.com/products/{shopify_product.get('handle', '')}"
-                }
-                
+            # Create product via Shopify REST API, within the shared create rate
+            await get_product_create_limiter().acquire()
+            url = f"{self.api_base_url}/products.json"
+            client = get_http_client(url)
+            response = await client.post(url, headers=self.headers, json=product_data, timeout=30.0)
+            response.raise_for_status()
+            
+            result = response.json()
+            shopify_product = result["product"]
+            
+            logger.info(f"Product added successfully: {shopify_product['id']}")
+            await self._record_cost(product)
+            await self._record_listing(product, str(shopify_product["id"]))
+            return {
+                "id": str(shopify_product["id"]),
+                "title": shopify_product["title"],
+                "description": shopify_product.get("body_html", ""),
+                "price": float(shopify_product["variants"][0]["price"]) if shopify_product.get("variants") else product.price,
+                "status": shopify_product.get("status", "active"),
+                "tags": shopify_product.get("tags", "").split(",") if shopify_product.get("tags") else tags,
+                "url": f"https://{self.store_name}.myshopify.com/products/{shopify_product.get('handle', '')}"
+            }
+        
         except Exception as e:
             logger.error(f"Error adding product: {e}")
             raise
     
-    async def get_products(self, limit: int = 50) -> List[Dict]:
-        """Get all products from store."""
+    async def _record_cost(self, product: Product):
+        """Index the listed SKU's landed cost for profit analytics."""
+        if not product.id:
+            return
+        try:
+            await self.cost_index.record(
+                product.id,
+                product.cost,
+                product.supplier_id,
+                shipping_cost=float(product.shipping_info.get("cost", 0.0))
+            )
+        except Exception as e:
+            logger.error(f"Error recording cost for SKU {product.id}: {e}")
+    
+    async def _record_listing(self, product: Product, shopify_product_id: str):
+        """Mark the product as listed so discovery skips it, and store it in the catalog."""
+        if not product.id:
+            return
+        try:
+            await self.seen_products.mark_seen(product.id, product.supplier_id, shopify_product_id)
+            await self.catalog.upsert_products([product])
+            await self.catalog.mark_listed(product.id, shopify_product_id)
+        except Exception as e:
+            logger.error(f"Error recording listing of {product.id} in catalog: {e}")
+    
+    async def get_products(self, limit: Optional[int] = 50) -> List[Dict]:
+        """Get products from store, following cursor pagination (limit=None for all)."""
         if not self.session_configured:
             return []
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                url = f"{self.api_base_url}/products.json?limit={limit}"
-                response = await client.get(url, headers=self.headers)
-                response.raise_for_status()
-                
-                result = response.json()
-                products = result.get("products", [])
-                return [self._serialize_product(p) for p in products]
+            products = []
+            async for shopify_product in self.shopify.iter_products():
+                products.append(self._serialize_product(shopify_product))
+                if limit is not None and len(products) >= limit:
+                    break
+            return products
         except Exception as e:
             logger.error(f"Error getting products: {e}")
             return []
@@ -174,26 +219,101 @@ class ShopifyManager:
             return False
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                # Get product first to get variant ID
-                url = f"{self.api_base_url}/products/{product_id}.json"
-                response = await client.get(url, headers=self.headers)
-                response.raise_for_status()
-                
-                product = response.json()["product"]
-                if product.get("variants"):
-                    variant_id = product["variants"][0]["id"]
-                    # Update variant price
-                    update_url = f"{self.api_base_url}/variants/{variant_id}.json"
-                    update_data = {"variant": {"price": str(new_price)}}
-                    update_response = await client.put(update_url, headers=self.headers, json=update_data)
-                    update_response.raise_for_status()
-                    return True
+            # Get product first to get variant ID
+            url = f"{self.api_base_url}/products/{product_id}.json"
+            client = get_http_client(url)
+            response = await client.get(url, headers=self.headers, timeout=30.0)
+            response.raise_for_status()
+            
+            product = response.json()["product"]
+            if product.get("variants"):
+                variant_id = product["variants"][0]["id"]
+                # Update variant price
+                update_url = f"{self.api_base_url}/variants/{variant_id}.json"
+                update_data = {"variant": {"price": str(new_price)}}
+                update_response = await client.put(update_url, headers=self.headers, json=update_data, timeout=30.0)
+                update_response.raise_for_status()
+                return True
             return False
         except Exception as e:
             logger.error(f"Error updating price: {e}")
             return False
     
+    async def update_variant_prices(self, prices: Dict[str, float]) -> Dict[str, bool]:
+        """
+        Push new prices for many variants at once.
+
+        Variant IDs are already known, so each update is a single PUT; at
+        most price_update_concurrency requests are in flight.
+
+        Args:
+            prices: New price per Shopify variant ID
+
+        Returns:
+            Whether each variant was updated
+        """
+        if not self.session_configured:
+            return {variant_id: False for variant_id in prices}
+        
+        semaphore = asyncio.Semaphore(settings.price_update_concurrency)
+        
+        async def update(variant_id: str, price: float) -> bool:
+            async with semaphore:
+                try:
+                    url = f"{self.api_base_url}/variants/{variant_id}.json"
+                    client = get_http_client(url)
+                    data = {"variant": {"id": variant_id, "price": f"{price:.2f}"}}
+                    response = await client.put(url, headers=self.headers, json=data, timeout=30.0)
+                    response.raise_for_status()
+                    return True
+                except Exception as e:
+                    logger.error(f"Error updating price of variant {variant_id}: {e}")
+                    return False
+        
+        results = await asyncio.gather(*(update(variant_id, price) for variant_id, price in prices.items()))
+        return dict(zip(prices, results))
+    
+    async def get_product_variants(self, product_ids: List[str]) -> List[Dict]:
+        """Variants (id, product_id, sku, price) of the given products; products that fail to load are left out."""
+        if not self.session_configured:
+            return []
+        
+        semaphore = asyncio.Semaphore(settings.price_update_concurrency)
+        
+        async def fetch(product_id: str) -> List[Dict]:
+            async with semaphore:
+                try:
+                    url = f"{self.api_base_url}/products/{product_id}.json"
+                    client = get_http_client(url)
+                    response = await client.get(url, headers=self.headers, params={"fields": "id,variants"}, timeout=30.0)
+                    response.raise_for_status()
+                    variants = response.json()["product"].get("variants", [])
+                    for variant in variants:
+                        variant.setdefault("product_id", product_id)
+                    return variants
+                except Exception as e:
+                    logger.error(f"Error getting variants of product {product_id}: {e}")
+                    return []
+        
+        results = await asyncio.gather(*(fetch(product_id) for product_id in product_ids))
+        return [variant for variants in results for variant in variants]
+    
+    async def set_product_status(self, product_id: str, status: str) -> bool:
+        """Set a product's status ("active", "draft" or "archived")."""
+        if not self.session_configured:
+            return False
+        
+        try:
+            url = f"{self.api_base_url}/products/{product_id}.json"
+            client = get_http_client(url)
+            data = {"product": {"id": product_id, "status": status}}
+            response = await client.put(url, headers=self.headers, json=data, timeout=30.0)
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            logger.error(f"Error setting status of product {product_id}: {e}")
+            return False
+    
     def _serialize_product(self, shopify_product: Dict) -> Dict:
         """Serialize Shopify product to dict."""
         return {
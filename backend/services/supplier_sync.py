@@ -0,0 +1,271 @@
+"""Incremental feed of supplier price and stock changes for listed products."""
+import asyncio
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+from sqlalchemy import select
+
+from backend.models.database import SupplierSnapshotRecord, SyncState, get_sessionmaker, upsert, bulk_upsert
+from backend.config.settings import get_settings
+from backend.services.http_client import get_http_client
+from backend.services.cost_index import get_cost_index
+from backend.services.seen_products import get_seen_product_index
+from backend.services.shopify_manager import ShopifyManager
+from backend.services.repricing import RepricingEngine
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+SYNC_NAME = "cj_products"
+PAGE_SIZE = 100
+
+# Product ids per IN (...) lookup
+LOOKUP_BATCH_SIZE = 500
+
+
+def snapshot_checksum(price: float, shipping_cost: float, stock: Optional[int]) -> str:
+    """Checksum of the supplier fields that matter downstream."""
+    return hashlib.md5(f"{price:.2f}|{shipping_cost:.2f}|{stock}".encode("utf-8")).hexdigest()
+
+
+class SupplierChangeFeed:
+    """
+    Detects supplier cost and stock changes for products we have listed.
+
+    Each run asks CJ only for products updated since the stored cursor,
+    keeps the ones we have listed, and diffs their price/shipping/stock
+    checksum against the last snapshot. Only products whose checksum
+    changed are passed on: new landed costs are recorded and the products
+    repriced, sold-out products are set to draft and restocked ones
+    reactivated. A run's cost therefore follows the number of changed
+    products, not the catalog size.
+
+    A run reads at most supplier_sync_max_pages pages; a longer feed is
+    continued from the next page on the following runs, and the cursor
+    moves to the start of the window once it has been read to the end.
+    A product's snapshot is only written once its change has been fully
+    applied, and the feed only advances past pages whose changes all
+    were, so a failed Shopify update is retried on the next run.
+    """
+    
+    def __init__(self):
+        self.cj_api_key = settings.cj_api_key
+        self.cj_base_url = settings.cj_base_url
+        self.cost_index = get_cost_index()
+        self.seen_products = get_seen_product_index()
+        self.shopify_manager = ShopifyManager()
+        self.repricing = RepricingEngine()
+        self._lock = asyncio.Lock()
+    
+    async def sync(self) -> List[Dict]:
+        """
+        Pull supplier updates since the last run and apply the changes.
+
+        Returns:
+            The changes that were applied
+        """
+        if not self.cj_api_key:
+            return []
+        
+        async with self._lock:
+            state = await self._get_state()
+            started_at = datetime.utcnow().isoformat(timespec="seconds")
+            if state is None or not state.cursor:
+                # Track changes from now on rather than paging the supplier's whole catalog
+                await self._save_state(started_at)
+                logger.info("Supplier sync initialized, tracking changes from now")
+                return []
+            
+            # A window continued from an earlier run ends at that run's start
+            window_end = state.pending_cursor or started_at
+            first_page = state.next_page or 1
+            updated, next_page = await self._fetch_updated(state.cursor, first_page)
+            listings = await self.seen_products.listings(updated)
+            changes = await self._diff({
+                product_id: item for product_id, item in updated.items() if product_id in listings
+            })
+            
+            applied = await self._apply(changes, listings) if changes else []
+            await self._store_snapshots(applied)
+            
+            if len(applied) < len(changes):
+                # Re-reading these pages is cheap: applied changes no longer differ
+                logger.warning(
+                    f"Supplier sync incomplete ({len(applied)} of {len(changes)} changes applied), "
+                    f"will re-read from page {first_page}"
+                )
+            elif next_page is None:
+                await self._save_state(window_end)
+            else:
+                await self._save_state(state.cursor, next_page=next_page, pending_cursor=window_end)
+                logger.info(f"Supplier change feed continues from page {next_page} next run")
+            
+            logger.info(f"Supplier sync: {len(updated)} updated, {len(applied)} listed products changed")
+            return applied
+    
+    async def _fetch_updated(self, cursor: str, first_page: int = 1) -> Tuple[Dict[str, Dict], Optional[int]]:
+        """
+        Supplier products updated since the cursor, keyed by product id.
+
+        Reads at most supplier_sync_max_pages pages from first_page.
+
+        Returns:
+            The products, and the page to continue from (None once the
+            feed was read to the end)
+        """
+        url = f"{self.cj_base_url}/api/products/list"
+        headers = {
+            "Authorization": f"Bearer {self.cj_api_key}",
+            "Content-Type": "application/json"
+        }
+        client = get_http_client(url)
+        
+        updated = {}
+        last_page = first_page + max(1, settings.supplier_sync_max_pages) - 1
+        for page in range(first_page, last_page + 1):
+            params = {"page": page, "limit": PAGE_SIZE, "updatedSince": cursor}
+            response = await client.get(url, headers=headers, params=params, timeout=30.0)
+            response.raise_for_status()
+            items = response.json().get("data", {}).get("list", [])
+            
+            for item in items:
+                if item.get("productId"):
+                    updated[item["productId"]] = item
+            
+            if len(items) < PAGE_SIZE:
+                return updated, None
+        
+        return updated, last_page + 1
+    
+    async def _diff(self, items: Dict[str, Dict]) -> List[Dict]:
+        """Compare items against their snapshots; returns the changed ones with their new snapshot."""
+        if not items:
+            return []
+        
+        product_ids = list(items)
+        previous = {}
+        async with get_sessionmaker()() as session:
+            for start in range(0, len(product_ids), LOOKUP_BATCH_SIZE):
+                rows = (await session.execute(
+                    select(SupplierSnapshotRecord)
+                    .where(SupplierSnapshotRecord.product_id.in_(product_ids[start:start + LOOKUP_BATCH_SIZE]))
+                )).scalars().all()
+                previous.update({row.product_id: row for row in rows})
+        
+        changes = []
+        for product_id, item in items.items():
+            price = float(item.get("price", 0))
+            shipping_cost = float(item.get("shippingCost", 0))
+            stock = item.get("stock")
+            stock = int(stock) if stock is not None else None
+            checksum = snapshot_checksum(price, shipping_cost, stock)
+            
+            snapshot = previous.get(product_id)
+            if snapshot is not None and snapshot.checksum == checksum:
+                continue
+            
+            changes.append({
+                "product_id": product_id,
+                "price": price,
+                "shipping_cost": shipping_cost,
+                "stock": stock,
+                "checksum": checksum,
+                "previous_landed_cost": snapshot.price + snapshot.shipping_cost if snapshot is not None else None,
+                "previous_stock": snapshot.stock if snapshot is not None else None
+            })
+        return changes
+    
+    async def _apply(self, changes: List[Dict], listings: Dict[str, Optional[str]]) -> List[Dict]:
+        """Record new costs, reprice, and unlist or relist on stock changes; returns the changes applied."""
+        await self.cost_index.load()
+        applied = []
+        reprice = {}
+        for change in changes:
+            shopify_product_id = listings.get(change["product_id"])
+            try:
+                if not await self._apply_change(change, shopify_product_id):
+                    continue
+            except Exception as e:
+                logger.error(f"Error applying supplier change to {change['product_id']}: {e}")
+                continue
+            
+            landed_cost = change["price"] + change["shipping_cost"]
+            if shopify_product_id and landed_cost != change["previous_landed_cost"]:
+                reprice[shopify_product_id] = change
+            else:
+                applied.append(change)
+        
+        if reprice:
+            try:
+                repriced = await self.repricing.reprice_products(list(reprice))
+            except Exception as e:
+                logger.error(f"Error repricing {len(reprice)} products after supplier changes: {e}")
+                repriced = set()
+            
+            # Products whose new prices did not all reach Shopify are retried next run
+            applied.extend(change for product_id, change in reprice.items() if product_id in repriced)
+            if len(repriced) < len(reprice):
+                logger.warning(f"Repricing failed for {len(reprice) - len(repriced)} products after supplier changes")
+        return applied
+    
+    async def _apply_change(self, change: Dict, shopify_product_id: Optional[str]) -> bool:
+        """Record one product's landed cost and update its listing status; False if Shopify refused."""
+        product_id = change["product_id"]
+        landed_cost = change["price"] + change["shipping_cost"]
+        if self.cost_index.get(product_id) != landed_cost:
+            await self.cost_index.record(product_id, landed_cost, shipping_cost=change["shipping_cost"])
+        
+        if not shopify_product_id or change["stock"] is None:
+            return True
+        if change["stock"] <= 0 and change["previous_stock"] != 0:
+            if not await self.shopify_manager.set_product_status(shopify_product_id, "draft"):
+                return False
+            logger.info(f"Unlisted sold-out product {product_id}")
+        elif change["stock"] > 0 and change["previous_stock"] == 0:
+            if not await self.shopify_manager.set_product_status(shopify_product_id, "active"):
+                return False
+            logger.info(f"Relisted restocked product {product_id}")
+        return True
+    
+    async def _store_snapshots(self, changes: List[Dict]):
+        """Persist the new snapshots of applied changes."""
+        if not changes:
+            return
+        
+        now = datetime.utcnow()
+        snapshots = [
+            {
+                "product_id": change["product_id"],
+                "price": change["price"],
+                "shipping_cost": change["shipping_cost"],
+                "stock": change["stock"],
+                "checksum": change["checksum"],
+                "checked_at": now
+            }
+            for change in changes
+        ]
+        async with get_sessionmaker()() as session:
+            async with session.begin():
+                await bulk_upsert(session, SupplierSnapshotRecord, snapshots, ["product_id"])
+    
+    async def _get_state(self) -> Optional[SyncState]:
+        """Load the update-time cursor and any unfinished window."""
+        async with get_sessionmaker()() as session:
+            return await session.get(SyncState, SYNC_NAME)
+    
+    async def _save_state(self, cursor: str, next_page: Optional[int] = None, pending_cursor: Optional[str] = None):
+        """Persist the update-time cursor and where an unfinished window continues."""
+        async with get_sessionmaker()() as session:
+            async with session.begin():
+                await session.execute(upsert(
+                    SyncState,
+                    [{
+                        "name": SYNC_NAME,
+                        "cursor": cursor,
+                        "next_page": next_page,
+                        "pending_cursor": pending_cursor,
+                        "synced_at": datetime.utcnow()
+                    }],
+                    ["name"]
+                ))
@@ -0,0 +1,454 @@
+"""Supplier adapters queried by product discovery."""
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import math
+import re
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from datetime import datetime
+
+from backend.models.schemas import Product, ProductStatus
+from backend.config.settings import get_settings
+from backend.services.http_client import get_http_client
+from backend.services.cache import SWRCache
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Raw supplier search pages, shared by every service instance (API routes and
+# the orchestrator) so repeated queries reuse one fetch whatever their filters
+# Page fetches abandoned by an early-stopping scan are cancelled, not finished
+search_page_cache = SWRCache(
+    ttl=settings.discovery_cache_ttl, max_entries=settings.discovery_cache_size, cancel_orphaned=True
+)
+
+# Composite score weights; each component is normalized to 0-1
+SCORE_WEIGHTS = {"margin": 0.4, "profit": 0.25, "sales": 0.25, "shipping": 0.1}
+PROFIT_SCALE = 20.0  # Profit per unit scoring 0.5
+SALES_SCALE = 10000  # Sales volume scoring 1.0
+MAX_SHIPPING_DAYS = 30  # Slowest delivery still scoring above 0
+
+ExcludePredicate = Callable[[str], Awaitable[bool]]
+
+
+def shipping_days(shipping_time: Optional[str]) -> Optional[int]:
+    """Upper bound in days of a supplier shipping estimate like "7-15 days"."""
+    numbers = re.findall(r"\d+", str(shipping_time or ""))
+    return int(numbers[-1]) if numbers else None
+
+
+def composite_score(margin: float, profit: float, sales_volume: float, days: Optional[int]) -> float:
+    """Weighted product score from margin, unit profit, sales velocity and shipping time."""
+    profit_score = profit / (profit + PROFIT_SCALE) if profit > 0 else 0.0
+    sales_score = min(1.0, math.log1p(max(sales_volume, 0)) / math.log1p(SALES_SCALE))
+    shipping_score = 0.5 if days is None else max(0.0, 1 - days / MAX_SHIPPING_DAYS)
+    return (
+        SCORE_WEIGHTS["margin"] * margin
+        + SCORE_WEIGHTS["profit"] * profit_score
+        + SCORE_WEIGHTS["sales"] * sales_score
+        + SCORE_WEIGHTS["shipping"] * shipping_score
+    )
+
+
+def price_offer(supplier_price: float, shipping_cost: float) -> Tuple[float, float, float, float]:
+    """Landed cost, suggested price, unit profit and margin of a supplier offer."""
+    total_cost = supplier_price + shipping_cost
+    
+    # Suggested retail price (2-3x markup)
+    suggested_price = total_cost * settings.price_markup
+    
+    profit = suggested_price - total_cost
+    margin = profit / suggested_price if suggested_price > 0 else 0
+    return total_cost, suggested_price, profit, margin
+
+
+class TopK:
+    """Bounded min-heap keeping the highest-scoring raw items."""
+    
+    def __init__(self, capacity: int):
+        self.capacity = max(capacity, 1)
+        self._heap: List[Tuple[float, int, Any]] = []
+        self._order = itertools.count()
+    
+    def push(self, score: float, item: Any):
+        """Offer an item; it is kept only while among the best capacity items."""
+        entry = (score, next(self._order), item)
+        if len(self._heap) < self.capacity:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+    
+    def __len__(self) -> int:
+        return len(self._heap)
+    
+    def best(self) -> List[Tuple[float, Any]]:
+        """(score, item) pairs, best first."""
+        return [(score, item) for score, _, item in sorted(self._heap, reverse=True)]
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing source for a while.
+
+    After failure_threshold consecutive failures the breaker opens and
+    calls are skipped; once reset_timeout seconds pass a single trial call
+    is let through, and its outcome closes or re-opens the breaker.
+    """
+    
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+    
+    def allow(self) -> bool:
+        """Whether a call may go ahead now."""
+        if self.opened_at is None:
+            return True
+        if self._trial_running or time.monotonic() - self.opened_at < self.reset_timeout:
+            return False
+        self._trial_running = True
+        return True
+    
+    def record_success(self):
+        """Close the breaker."""
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+    
+    def release_trial(self):
+        """Forget an unfinished trial call (e.g. cancelled) so another can run."""
+        self._trial_running = False
+    
+    def record_failure(self):
+        """Count a failure, opening the breaker at the threshold."""
+        self.failures += 1
+        self._trial_running = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class SupplierAdapter(ABC):
+    """
+    A product source for discovery.
+
+    Subclasses implement search(), returning products best score first;
+    discover() wraps it with the source's timeout and circuit breaker so a
+    slow or failing source never holds up the others.
+    """
+    
+    name: str = "supplier"
+    
+    def __init__(self):
+        self.breaker = CircuitBreaker(settings.supplier_breaker_failures, settings.supplier_breaker_reset)
+    
+    @property
+    @abstractmethod
+    def configured(self) -> bool:
+        """Whether the source can be queried."""
+    
+    @abstractmethod
+    async def search(
+        self,
+        category: Optional[str],
+        min_margin: float,
+        limit: int,
+        exclude: Optional[ExcludePredicate] = None
+    ) -> List[Product]:
+        """Qualifying products, best score first."""
+    
+    async def discover(
+        self,
+        category: Optional[str],
+        min_margin: float,
+        limit: int,
+        exclude: Optional[ExcludePredicate] = None
+    ) -> Optional[List[Product]]:
+        """search() under the source's timeout and breaker; None if the source failed or was skipped."""
+        if not self.breaker.allow():
+            logger.warning(f"Skipping {self.name}: circuit open")
+            return None
+        
+        try:
+            products = await asyncio.wait_for(
+                self.search(category, min_margin, limit, exclude),
+                timeout=settings.supplier_timeout
+            )
+        except asyncio.CancelledError:
+            # Cancelled by the caller, which says nothing about the source
+            self.breaker.release_trial()
+            raise
+        except Exception as e:
+            self.breaker.record_failure()
+            logger.error(f"Error discovering {self.name} products: {e!r}")
+            return None
+        
+        self.breaker.record_success()
+        return products
+
+
+class CJSupplier(SupplierAdapter):
+    """
+    CJdropshipping search API.
+
+    Search pages for every requested category are fetched concurrently
+    (bounded by discovery_concurrency) and scored as they arrive. Raw
+    items are kept in a bounded min-heap of the best candidates, and
+    Product models are built only for those survivors. The scan stops,
+    cancelling the remaining page requests, once enough items have
+    qualified to fill the heap.
+    """
+    
+    name = "CJ"
+    
+    def __init__(self):
+        super().__init__()
+        self.cj_api_key = settings.cj_api_key
+        self.cj_base_url = settings.cj_base_url
+        self.min_daily_sales = settings.min_daily_sales
+    
+    @property
+    def configured(self) -> bool:
+        return bool(self.cj_api_key)
+    
+    async def search(
+        self,
+        category: Optional[str],
+        min_margin: float,
+        limit: int,
+        exclude: Optional[ExcludePredicate] = None
+    ) -> List[Product]:
+        categories = [category] if category else (settings.discovery_categories or [None])
+        requests = [
+            (page_category, page)
+            for page in range(1, settings.discovery_max_pages + 1)
+            for page_category in categories
+        ]
+        semaphore = asyncio.Semaphore(settings.discovery_concurrency)
+        
+        async def fetch(page_category: Optional[str], page: int) -> List[Dict]:
+            async with semaphore:
+                return await self._fetch_page(page_category, page)
+        
+        tasks = [asyncio.create_task(fetch(*request)) for request in requests]
+        # Headroom over limit for offers later dropped as image duplicates
+        top = TopK(limit * settings.discovery_oversample)
+        seen_ids = set()
+        qualified = 0
+        failed = 0
+        error = None
+        
+        try:
+            for next_page in asyncio.as_completed(tasks):
+                try:
+                    items = await next_page
+                except Exception as e:
+                    logger.error(f"Error fetching CJ search page: {e}")
+                    failed += 1
+                    error = e
+                    continue
+                
+                for item in items:
+                    product_id = item.get("productId")
+                    if product_id and product_id in seen_ids:
+                        continue
+                    score = self._score_item(item, min_margin)
+                    if score is None:
+                        continue
+                    if exclude is not None and await exclude(product_id):
+                        continue
+                    seen_ids.add(product_id)
+                    qualified += 1
+                    top.push(score, item)
+                
+                if qualified >= top.capacity:
+                    break
+        finally:
+            # Pages still queued or in flight are no longer needed
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        if tasks and failed == len(tasks):
+            # Every page failed: report it so the breaker sees the outage
+            raise error
+        
+        return [self._build_product(item, score) for score, item in top.best()]
+    
+    async def _fetch_page(self, category: Optional[str], page: int) -> List[Dict]:
+        """One page of CJ search results, served from the search page cache."""
+        category = category.strip() if category else None
+        key = ("cj", category.casefold() if category else None, page, settings.discovery_page_size)
+        return await search_page_cache.get(key, lambda: self._request_page(category, page))
+    
+    async def _request_page(self, category: Optional[str], page: int) -> List[Dict]:
+        """Fetch one page of CJ search results, best sellers first."""
+        url = f"{self.cj_base_url}/api/products/search"
+        headers = {
+            "Authorization": f"Bearer {self.cj_api_key}",
+            "Content-Type": "application/json"
+        }
+        params = {
+            "page": page,
+            "limit": settings.discovery_page_size,
+            "sort": "sales",  # Sort by sales volume
+            "order": "desc"
+        }
+        
+        if category:
+            params["category"] = category
+        
+        client = get_http_client(url)
+        response = await client.get(url, headers=headers, params=params, timeout=30.0)
+        response.raise_for_status()
+        data = response.json()
+        return data.get("data", {}).get("list", [])
+    
+    def _score_item(self, item: Dict, min_margin: float) -> Optional[float]:
+        """Composite score of a raw CJ item; None if it fails the margin or sales filters."""
+        _, _, profit, margin = price_offer(float(item.get("price", 0)), float(item.get("shippingCost", 0)))
+        sales_volume = item.get("salesVolume", 0)
+        
+        # Filter by minimum margin and sales volume
+        if margin < min_margin or sales_volume < self.min_daily_sales:
+            return None
+        
+        return composite_score(margin, profit, sales_volume, shipping_days(item.get("shippingTime")))
+    
+    def _build_product(self, item: Dict, score: float) -> Product:
+        """Build the Product model for a scored CJ item."""
+        shipping_cost = float(item.get("shippingCost", 0))
+        total_cost, suggested_price, profit, margin = price_offer(float(item.get("price", 0)), shipping_cost)
+        
+        return Product(
+            id=item.get("productId"),
+            title=item.get("productName", ""),
+            description=item.get("description", ""),
+            price=suggested_price,
+            cost=total_cost,
+            margin=margin,
+            profit=profit,
+            score=score,
+            category=item.get("category", ""),
+            images=item.get("images", []),
+            supplier_id=item.get("supplierId", ""),
+            supplier_name=item.get("supplierName", "CJ Supplier"),
+            supplier_url=item.get("productUrl", ""),
+            shipping_info={
+                "cost": shipping_cost,
+                "time": item.get("shippingTime", "7-15 days")
+            },
+            status=ProductStatus.DISCOVERED,
+            created_at=datetime.utcnow()
+        )
+
+
+class AliExpressSupplier(SupplierAdapter):
+    """
+    AliExpress offers from a recorded search fixture.
+
+    Stands in for the AliExpress dropshipping API until it is wired up:
+    the fixture holds product.query responses recorded from AliExpress and
+    is only used when aliexpress_fixture_path is set.
+    """
+    
+    name = "AliExpress"
+    
+    def __init__(self):
+        super().__init__()
+        self.fixture_path = settings.aliexpress_fixture_path
+        self.min_daily_sales = settings.min_daily_sales
+        self._items: Optional[List[Dict]] = None
+    
+    @property
+    def configured(self) -> bool:
+        return bool(self.fixture_path)
+    
+    async def search(
+        self,
+        category: Optional[str],
+        min_margin: float,
+        limit: int,
+        exclude: Optional[ExcludePredicate] = None
+    ) -> List[Product]:
+        wanted = category.strip().casefold() if category else None
+        top = TopK(limit * settings.discovery_oversample)
+        
+        for item in await self._load_items():
+            if wanted and (item.get("first_level_category_name") or "").casefold() != wanted:
+                continue
+            score = self._score_item(item, min_margin)
+            if score is None:
+                continue
+            if exclude is not None and await exclude(str(item.get("product_id"))):
+                continue
+            top.push(score, item)
+        
+        return [self._build_product(item, score) for score, item in top.best()]
+    
+    async def _load_items(self) -> List[Dict]:
+        """Recorded product.query results, read once."""
+        if self._items is None:
+            data = await asyncio.to_thread(Path(self.fixture_path).read_text, encoding="utf-8")
+            self._items = json.loads(data).get("products", [])
+        return self._items
+    
+    def _score_item(self, item: Dict, min_margin: float) -> Optional[float]:
+        """Composite score of a raw AliExpress item; None if it fails the margin or sales filters."""
+        _, _, profit, margin = price_offer(
+            float(item.get("target_sale_price", 0)), float(item.get("shipping_fee", 0))
+        )
+        sales_volume = int(item.get("lastest_volume", 0))
+        
+        if margin < min_margin or sales_volume < self.min_daily_sales:
+            return None
+        
+        return composite_score(margin, profit, sales_volume, shipping_days(item.get("ship_to_days")))
+    
+    def _build_product(self, item: Dict, score: float) -> Product:
+        """Build the Product model for a scored AliExpress item."""
+        shipping_cost = float(item.get("shipping_fee", 0))
+        total_cost, suggested_price, profit, margin = price_offer(
+            float(item.get("target_sale_price", 0)), shipping_cost
+        )
+        images = [item["product_main_image_url"]] if item.get("product_main_image_url") else []
+        images += item.get("product_small_image_urls", {}).get("string", [])
+        
+        return Product(
+            id=str(item.get("product_id")),
+            title=item.get("product_title", ""),
+            description=item.get("product_title", ""),
+            price=suggested_price,
+            cost=total_cost,
+            margin=margin,
+            profit=profit,
+            score=score,
+            category=item.get("first_level_category_name", ""),
+            images=images,
+            supplier_id=str(item.get("shop_id", "")),
+            supplier_name=item.get("shop_name", "AliExpress Supplier"),
+            supplier_url=item.get("product_detail_url", ""),
+            shipping_info={
+                "cost": shipping_cost,
+                "time": f"{item.get('ship_to_days', '15')} days"
+            },
+            status=ProductStatus.DISCOVERED,
+            created_at=datetime.utcnow()
+        )
+
+
+_suppliers: Optional[List[SupplierAdapter]] = None
+
+
+def get_suppliers() -> List[SupplierAdapter]:
+    """Get the supplier adapters; shared so breakers see every caller's failures."""
+    global _suppliers
+    if _suppliers is None:
+        _suppliers = [CJSupplier(), AliExpressSupplier()]
+    return _suppliers
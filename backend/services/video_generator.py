@@ -1,12 +1,12 @@
 """Video generation service for creating product ad videos."""
 import logging
 from typing import Optional
-import httpx
 from moviepy.editor import ImageClip, TextClip, CompositeVideoClip, concatenate_videoclips
 import tempfile
 import os
 
 from backend.config.settings import get_settings
+from backend.services.http_client import get_media_client
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -146,19 +146,19 @@ class VideoGenerator:
     async def _download_image(self, url: str) -> str:
         """Download image from URL."""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, timeout=10.0)
-                response.raise_for_status()
-                
-                # Save to temp file
-                ext = url.split('.')[-1].split('?')[0] if '.' in url else 'jpg'
-                temp_path = os.path.join(self.temp_dir, f"img_{hash(url)}.{ext}")
-                
-                with open(temp_path, 'wb') as f:
-                    f.write(response.content)
-                
-                return temp_path
-                
+            client = get_media_client()
+            response = await client.get(url, timeout=10.0)
+            response.raise_for_status()
+            
+            # Save to temp file
+            ext = url.split('.')[-1].split('?')[0] if '.' in url else 'jpg'
+            temp_path = os.path.join(self.temp_dir, f"img_{hash(url)}.{ext}")
+            
+            with open(temp_path, 'wb') as f:
+                f.write(response.content)
+            
+            return temp_path
+            
         except Exception as e:
             logger.error(f"Error downloading image: {e}")
             # Return placeholder path